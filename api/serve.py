@@ -0,0 +1,67 @@
+"""Production launcher: load the model once, then pre-fork uvicorn workers.
+
+Run from the project root (model paths are relative to it):
+
+    python api/serve.py --workers 4 --port 8000 --max-requests 50000
+
+Rolling recycle is the reload mechanism here: ``kill -HUP <parent>`` (or
+``POST /admin/reload?force=true`` on any worker) makes the parent reload the
+model and then re-fork the workers one at a time from it. ``kill -USR2
+<parent>`` (or ``POST /admin/reload``) does the same only if the model file
+changed. With MODEL_WATCH_INTERVAL_S set the parent polls the model file and
+reloads when it changes; the workers themselves never swap models. ``kill -USR1 <parent>`` logs
+per-worker memory. Best with INFERENCE_EXECUTOR=auto, thread or inline: the
+process executor spawns fresh interpreters that load their own model copy.
+"""
+import argparse
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.prefork import PreforkServer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the churn API from pre-forked workers sharing one model")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--max-requests", type=int, default=int(os.environ.get("MAX_REQUESTS", "0")),
+                        help="Recycle a worker after this many requests (0 = never)")
+    parser.add_argument("--max-requests-jitter", type=int, default=int(os.environ.get("MAX_REQUESTS_JITTER", "0")))
+    parser.add_argument("--max-worker-age", type=float, default=float(os.environ.get("MAX_WORKER_AGE_S", "0")),
+                        help="Recycle a worker after this many seconds (0 = never)")
+    parser.add_argument("--graceful-timeout", type=float, default=float(os.environ.get("GRACEFUL_TIMEOUT_S", "30")))
+    parser.add_argument("--memory-report-interval", type=float,
+                        default=float(os.environ.get("MEMORY_REPORT_INTERVAL_S", "0")),
+                        help="Log per-worker RSS/PSS/shared/private memory every N seconds (0 = only on SIGUSR1)")
+    parser.add_argument("--log-level", default=os.environ.get("LOG_LEVEL", "info"))
+    args = parser.parse_args()
+
+    # Importing the app loads and compiles the model in this (parent) process
+    import api.app as app_module
+
+    store = app_module.store
+
+    PreforkServer(
+        app_module.app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        max_age_s=args.max_worker_age,
+        graceful_timeout_s=args.graceful_timeout,
+        memory_report_s=args.memory_report_interval,
+        log_level=args.log_level,
+        reload_model=lambda force: store.reload_now(force)[1],
+        model_changed=store.changed_on_disk,
+        watch_s=app_module.MODEL_WATCH_INTERVAL_S,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
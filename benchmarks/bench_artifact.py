@@ -0,0 +1,121 @@
+"""Startup time and memory: pickled pipeline versus the memory-mapped artifact.
+
+Each load runs in a fresh interpreter that imports NumPy/sklearn first, so the
+numbers isolate the model itself: wall time of the load call and the RSS /
+private memory it adds. ``--estimator rf`` (or ``gb``) refits the saved
+pipeline's final step as a 200-tree ensemble on synthetic labels, to show the
+difference on the large forests the pickle struggles with.
+
+Usage (from the project root, with a trained model in ./models):
+    python -m benchmarks.bench_artifact --estimator rf --runs 5
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.artifact import load_artifact, save_artifact
+from src.compiled import CompiledScorer
+from src.prefork import process_memory
+
+
+def _child(fmt: str, path: str) -> None:
+    import sklearn.ensemble  # noqa: F401  (imports are not part of the measurement)
+    import sklearn.pipeline  # noqa: F401
+
+    before = process_memory()
+    t0 = time.perf_counter()
+    if fmt == "pickle":
+        with open(path, "rb") as f:
+            model = pickle.load(f)
+    else:
+        model = load_artifact(path)
+    load_s = time.perf_counter() - t0
+    after = process_memory()
+    assert model is not None
+    private = lambda m: m.get("Private_Clean", 0) + m.get("Private_Dirty", 0)  # noqa: E731
+    print(json.dumps({
+        "load_ms": load_s * 1000.0,
+        "rss_mb": (after.get("Rss", 0) - before.get("Rss", 0)) / 1024,
+        "private_mb": (private(after) - private(before)) / 1024,
+    }))
+
+
+def _measure(fmt: str, path: str, runs: int) -> Dict[str, float]:
+    results: List[Dict[str, float]] = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_artifact", "--child", fmt, path],
+            check=True, capture_output=True, text=True,
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {k: float(np.median([r[k] for r in results])) for k in results[0]}
+
+
+def _dir_size_mb(path: str) -> float:
+    if os.path.isfile(path):
+        return os.path.getsize(path) / 1e6
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-path", default=os.path.join("models", "best_model_pipeline.pkl"))
+    parser.add_argument("--estimator", choices=("saved", "rf", "gb"), default="saved")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", nargs=2, metavar=("FORMAT", "PATH"), help=argparse.SUPPRESS)
+    ns = parser.parse_args()
+
+    if ns.child:
+        _child(*ns.child)
+        return 0
+
+    with open(ns.model_path, "rb") as f:
+        pipeline = pickle.load(f)
+
+    if ns.estimator != "saved":
+        from sklearn.base import clone
+        from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+
+        scorer = CompiledScorer.from_pipeline(pipeline)
+        records = scorer.reference_records(n=5000, seed=1)
+        X = pd.DataFrame(records)[scorer.input_columns]
+        # Labels only need to give the trees something to split on
+        y = (pipeline.predict_proba(X)[:, 1] > np.random.default_rng(0).random(len(X))).astype(int)
+        est = (
+            RandomForestClassifier(n_estimators=200, random_state=42)
+            if ns.estimator == "rf"
+            else GradientBoostingClassifier(n_estimators=200, random_state=42)
+        )
+        pipeline = clone(pipeline)
+        pipeline.steps[-1] = ("estimator", est)
+        pipeline.fit(X, y)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pkl_path = os.path.join(tmp, "model.pkl")
+        with open(pkl_path, "wb") as f:
+            pickle.dump(pipeline, f)
+        manifest = save_artifact(pipeline, os.path.join(tmp, "artifact"))
+
+        rows = [
+            ("pickle", pkl_path, _dir_size_mb(pkl_path), _measure("pickle", pkl_path, ns.runs)),
+            ("artifact (mmap)", manifest, _dir_size_mb(os.path.dirname(manifest)), _measure("artifact", manifest, ns.runs)),
+        ]
+
+    print(f"estimator: {type(pipeline.steps[-1][1]).__name__}, median of {ns.runs} fresh processes")
+    print(f"{'format':<18}{'size_mb':>10}{'load_ms':>10}{'rss_mb':>10}{'private_mb':>12}")
+    for name, _, size, r in rows:
+        print(f"{name:<18}{size:>10.2f}{r['load_ms']:>10.2f}{r['rss_mb']:>10.2f}{r['private_mb']:>12.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,106 @@
+"""Compare inference executor modes for the FastAPI service.
+
+Drives ``/predict`` in-process through an ASGI transport with a fixed number
+of concurrent clients while a probe polls ``/health``, and reports throughput
+plus predict and health-check latency percentiles for each executor mode.
+
+Usage (from the project root, with a trained model in ./models):
+    python -m benchmarks.bench_executor --requests 2000 --concurrency 32
+
+Needs ``httpx`` for the ASGI transport (``pip install httpx``); without it the
+benchmark reports itself skipped.
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+try:
+    import httpx
+except ImportError:  # benchmark-only dependency
+    httpx = None
+
+from benchmarks.common import SAMPLE_CUSTOMER, percentiles
+from src.executor import EXECUTOR_MODES, InferenceExecutor
+
+
+async def run_mode(api, mode: str, n_requests: int, concurrency: int, workers: int) -> Dict[str, float]:
+    # Every request repeats the same customer; measure inference, not cache hits
+    api.cache = None
+    api.executor = InferenceExecutor(
+        mode=mode,
+        max_workers=workers,
+        model_getter=lambda: api.store.current.scorer,
+        model_ref_getter=lambda: (api.store.current.path, api.store.current.version),
+        use_compiled=api.COMPILED_SCORER,
+    )
+    api.executor.start()
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up (process workers load the model on first use)
+        await asyncio.gather(*[client.post("/predict", json=SAMPLE_CUSTOMER) for _ in range(workers * 2)])
+
+        predict_lat: List[float] = []
+        health_lat: List[float] = []
+        remaining = n_requests
+        done = asyncio.Event()
+
+        async def worker() -> None:
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                t0 = time.perf_counter()
+                r = await client.post("/predict", json=SAMPLE_CUSTOMER)
+                predict_lat.append(time.perf_counter() - t0)
+                r.raise_for_status()
+
+        async def probe() -> None:
+            while not done.is_set():
+                t0 = time.perf_counter()
+                await client.get("/health")
+                health_lat.append(time.perf_counter() - t0)
+                await asyncio.sleep(0.01)
+
+        probe_task = asyncio.create_task(probe())
+        t_start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - t_start
+        done.set()
+        await probe_task
+
+    api.executor.shutdown(wait=True)
+    # A blocked event loop shows up as very few completed health probes
+    out = {"mode": mode, "throughput_rps": n_requests / elapsed, "health_probes": len(health_lat)}
+    out.update({f"predict_{k}_ms": v for k, v in percentiles(predict_lat).items()})
+    out.update({f"health_{k}_ms": v for k, v in percentiles(health_lat).items()})
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", default=list(EXECUTOR_MODES), choices=EXECUTOR_MODES)
+    ns = parser.parse_args()
+    if httpx is None:
+        print("skipped: httpx is not installed (pip install httpx)")
+        return 0
+
+    from api import app as api
+
+    if api.store.current is None:
+        raise SystemExit("No trained model found; run `python -m src.train` first.")
+
+    rows = [asyncio.run(run_mode(api, m, ns.requests, ns.concurrency, ns.workers)) for m in ns.modes]
+
+    cols = list(rows[0].keys())
+    print("  ".join(f"{c:>18}" for c in cols))
+    for r in rows:
+        print("  ".join(f"{r[c]:>18}" if isinstance(r[c], str) else f"{r[c]:>18.2f}" for c in cols))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
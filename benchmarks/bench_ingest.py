@@ -0,0 +1,117 @@
+"""Load time and peak memory of Telco CSV ingestion.
+
+Compares the original ``read_csv`` + element-wise ``TotalCharges`` fix with
+the typed loader in ``src.ingest`` (C and pyarrow parsers) and with a Parquet
+cache hit. The input is the real CSV's rows repeated up to ``--rows`` (fresh
+customer IDs, so ID parsing costs what it would). Each variant runs in a
+fresh interpreter; peak memory is that process's RSS high-water mark.
+
+Usage (from the project root):
+    python -m benchmarks.bench_ingest --data-path data/Telco_Customer_Churn_Dataset.csv --rows 2000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import peak_rss_mb
+from src.ingest import HAVE_PYARROW, cache_path, load_telco
+
+VARIANTS = ("baseline", "typed-c", "typed-pyarrow", "parquet-cache")
+
+
+def _baseline(csv_path: str) -> pd.DataFrame:
+    # The loader as it was before src.ingest
+    df = pd.read_csv(csv_path)
+    df["TotalCharges"] = df["TotalCharges"].replace(" ", np.nan).apply(pd.to_numeric, errors="coerce")
+    for id_col in ["customerID", "CustomerID", "customer_id"]:
+        if id_col in df.columns:
+            df = df.drop(columns=[id_col])
+            break
+    if df["Churn"].dtype == object:
+        df["Churn"] = df["Churn"].map({"Yes": 1, "No": 0})
+    df = df.dropna(subset=["Churn"])
+    df["Churn"] = df["Churn"].astype(int)
+    return df
+
+
+def _child(variant: str, csv_path: str, cache_dir: str) -> None:
+    t0 = time.perf_counter()
+    if variant == "baseline":
+        df = _baseline(csv_path)
+    elif variant == "typed-c":
+        df = load_telco(csv_path, engine="c")
+    elif variant == "typed-pyarrow":
+        df = load_telco(csv_path, engine="pyarrow")
+    else:
+        df = load_telco(csv_path, cache_dir=cache_dir)
+    seconds = time.perf_counter() - t0
+    print(json.dumps({
+        "seconds": seconds,
+        "peak_rss_mb": peak_rss_mb(),
+        "frame_mb": df.memory_usage(deep=True).sum() / 1e6,
+        "rows": len(df),
+    }))
+
+
+def make_big_csv(src_path: str, rows: int, out_path: str) -> None:
+    src = pd.read_csv(src_path, dtype=str, keep_default_na=False)
+    written = 0
+    with open(out_path, "w", newline="") as f:
+        while written < rows:
+            part = src.iloc[: rows - written].copy()
+            if "customerID" in part.columns:
+                part["customerID"] = [f"{written + i:010d}-SYN" for i in range(len(part))]
+            part.to_csv(f, header=written == 0, index=False)
+            written += len(part)
+
+
+def _run(variant: str, csv_path: str, cache_dir: str) -> Dict[str, float]:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_ingest", "--child", variant, csv_path, cache_dir],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-path", default=None)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--child", nargs=3, metavar=("VARIANT", "CSV", "CACHE_DIR"), help=argparse.SUPPRESS)
+    ns = parser.parse_args()
+
+    if ns.child:
+        _child(*ns.child)
+        return 0
+
+    from src.train import find_data_file
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "telco_big.csv")
+        print(f"Writing {ns.rows:,} rows ...")
+        make_big_csv(find_data_file(ns.data_path), ns.rows, csv_path)
+        print(f"CSV size: {os.path.getsize(csv_path) / 1e6:.1f} MB")
+
+        cache_dir = os.path.join(tmp, "cache")
+        variants = [v for v in VARIANTS if HAVE_PYARROW or v in ("baseline", "typed-c")]
+        if "parquet-cache" in variants:
+            load_telco(csv_path, cache_dir=cache_dir)  # populate the cache
+            print(f"Parquet size: {os.path.getsize(cache_path(csv_path, cache_dir)) / 1e6:.1f} MB")
+
+        print(f"\n{'variant':<16}{'seconds':>10}{'peak_rss_mb':>14}{'frame_mb':>11}")
+        for v in variants:
+            r = _run(v, csv_path, cache_dir)
+            print(f"{v:<16}{r['seconds']:>10.2f}{r['peak_rss_mb']:>14.1f}{r['frame_mb']:>11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,62 @@
+"""Latency saved by fused scoring versus separate predict + predict_proba calls.
+
+Times a single-row DataFrame through the saved pipeline the old way
+(``predict`` then ``predict_proba``) and through ``src.scoring.score_frame``
+(one ``predict_proba`` pass).
+
+Usage (from the project root, with a trained model in ./models):
+    python -m benchmarks.bench_scoring --repeats 500
+"""
+import argparse
+import os
+import pickle
+import time
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import SAMPLE_CUSTOMER
+from src.scoring import risk_level, score_frame
+
+
+def time_calls(fn: Callable[[], object], repeats: int) -> Dict[str, float]:
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    arr = np.asarray(samples) * 1000.0
+    return {"mean_ms": float(arr.mean()), "p50_ms": float(np.percentile(arr, 50)), "p99_ms": float(np.percentile(arr, 99))}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-path", default=os.path.join("models", "best_model_pipeline.pkl"))
+    parser.add_argument("--repeats", type=int, default=500)
+    ns = parser.parse_args()
+
+    with open(ns.model_path, "rb") as f:
+        model = pickle.load(f)
+    df = pd.DataFrame([SAMPLE_CUSTOMER])
+
+    def separate():
+        pred = int(model.predict(df)[0])
+        proba = float(model.predict_proba(df)[0][1])
+        return pred, risk_level(proba)
+
+    def fused():
+        return score_frame(model, df)[0]
+
+    old = time_calls(separate, ns.repeats)
+    new = time_calls(fused, ns.repeats)
+    print(f"{'variant':<28}{'mean_ms':>10}{'p50_ms':>10}{'p99_ms':>10}")
+    for name, r in (("predict + predict_proba", old), ("score_frame (fused)", new)):
+        print(f"{name:<28}{r['mean_ms']:>10.3f}{r['p50_ms']:>10.3f}{r['p99_ms']:>10.3f}")
+    print(f"Saved per call: {old['mean_ms'] - new['mean_ms']:.3f} ms ({1 - new['mean_ms'] / old['mean_ms']:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
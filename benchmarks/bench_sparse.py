@@ -0,0 +1,123 @@
+"""Dense versus sparse one-hot preprocessing with high-cardinality categoricals.
+
+The real Telco rows are repeated up to ``--rows`` and given synthetic
+``region`` / ``plan_code`` / ``device_model`` columns (``--levels`` each, with
+Zipf-like popularity). Each variant runs ``fit_feature_steps`` plus a
+LogisticRegression fit in a fresh interpreter and reports the wall time, the
+size of the preprocessed matrix and the peak memory added on top of the
+input frame. ``--levels 0,0,0`` measures the plain Telco width, where the
+automatic choice (``SPARSE_MIN_WIDTH``) keeps the dense path.
+
+Usage (from the project root):
+    python -m benchmarks.bench_sparse --data-path data/Telco_Customer_Churn_Dataset.csv --rows 50000
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from benchmarks.common import peak_rss_mb
+from src.ingest import load_telco
+
+VARIANTS = ("dense", "sparse")
+HIGH_CARDINALITY_COLUMNS = ("region", "plan_code", "device_model")
+
+
+def make_frame(csv_path: str, rows: int, levels: List[int], seed: int = 0) -> pd.DataFrame:
+    base = load_telco(csv_path)
+    df = base.iloc[np.arange(rows) % len(base)].reset_index(drop=True)
+    rng = np.random.default_rng(seed)
+    for name, n in zip(HIGH_CARDINALITY_COLUMNS, levels):
+        if n:
+            popularity = 1.0 / np.arange(1, n + 1)
+            codes = rng.choice(n, size=rows, p=popularity / popularity.sum())
+            df[name] = pd.Categorical.from_codes(codes, [f"{name}-{i:05d}" for i in range(n)])
+    return df
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def _matrix_mb(X) -> float:
+    if sp.issparse(X):
+        return (X.data.nbytes + X.indices.nbytes + X.indptr.nbytes) / 1e6
+    return X.nbytes / 1e6
+
+
+def _child(variant: str, csv_path: str, rows: int, levels: List[int]) -> None:
+    from sklearn.linear_model import LogisticRegression
+
+    from src.train import estimate_output_width, fit_feature_steps
+
+    df = make_frame(csv_path, rows, levels)
+    X, y = df.drop(columns=["Churn"]), df["Churn"].to_numpy()
+    before = _rss_mb()
+
+    t0 = time.perf_counter()
+    preprocessor, _, X_sel, _ = fit_feature_steps(X, y, sparse=variant == "sparse")
+    prep_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    LogisticRegression(max_iter=1000).fit(X_sel, y)
+    fit_s = time.perf_counter() - t0
+    peak = peak_rss_mb() - before
+
+    print(json.dumps({
+        "width": estimate_output_width(X),
+        "prep_seconds": prep_s,
+        "fit_seconds": fit_s,
+        "peak_extra_mb": peak,
+        # Measured after the peak so it doesn't inflate it
+        "matrix_mb": _matrix_mb(preprocessor.transform(X)),
+    }))
+
+
+def _run(variant: str, csv_path: str, rows: int, levels: str) -> Dict[str, float]:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_sparse", "--child", variant, csv_path, str(rows), levels],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-path", default=None)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument(
+        "--levels", default="100,500,1500",
+        help="Levels of the synthetic region,plan_code,device_model columns (0 leaves one out).",
+    )
+    parser.add_argument("--child", nargs=4, metavar=("VARIANT", "CSV", "ROWS", "LEVELS"), help=argparse.SUPPRESS)
+    ns = parser.parse_args()
+
+    if ns.child:
+        variant, csv_path, rows, levels = ns.child
+        _child(variant, csv_path, int(rows), [int(n) for n in levels.split(",")])
+        return 0
+
+    from src.train import SPARSE_MIN_WIDTH, find_data_file
+
+    csv_path = find_data_file(ns.data_path)
+    results = {v: _run(v, csv_path, ns.rows, ns.levels) for v in VARIANTS}
+    width = results["dense"]["width"]
+    auto = "sparse" if width >= SPARSE_MIN_WIDTH else "dense"
+    print(f"{ns.rows:,} rows, ~{width:,} preprocessed columns (auto picks {auto}, threshold {SPARSE_MIN_WIDTH})")
+    print(f"{'variant':<10}{'prep_s':>9}{'fit_s':>8}{'matrix_mb':>11}{'peak_extra_mb':>15}")
+    for v, r in results.items():
+        print(f"{v:<10}{r['prep_seconds']:>9.2f}{r['fit_seconds']:>8.2f}{r['matrix_mb']:>11.1f}{r['peak_extra_mb']:>15.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,311 @@
+"""End-to-end benchmark suite with JSON results and regression checks.
+
+Cases (all in-process, against the trained model in ./models):
+
+* ``single_record`` - one-row ``predict_proba`` latency through the pickled
+  pipeline, the compiled scorer and the dashboard's ``score_frame`` path;
+* ``batch_throughput`` - rows/s of pipeline and compiled scoring per batch size;
+* ``model_load`` - pickle versus artifact load time;
+* ``training`` - feature steps plus each candidate's fit in ``train_and_eval_models``;
+* ``http`` - ``/predict`` and ``/predict/batch`` latency through a FastAPI
+  TestClient (prediction cache off, so the model is measured).
+
+``run`` writes ``{"meta": ..., "cases": {case: {metric: value}}}``. ``compare``
+flags every metric that got worse than the baseline by more than
+``--tolerance`` (relative) and, for timings, by more than ``--min-delta-ms``
+(sub-0.1 ms jitter of the compiled scorer is not a regression). Metric names
+say which way is better (``*_ms`` / ``*_seconds`` lower, ``*_per_s`` higher);
+the exit status is 1 when anything regressed, so it can gate CI. Compare runs
+from the same machine: on a shared 1-CPU box, p50s moved by up to 1.7x
+between identical runs.
+
+Usage (from the project root, with a trained model in ./models):
+    python -m benchmarks.suite run --out reports/benchmark_results.json
+    python -m benchmarks.suite run --quick --baseline benchmarks/baseline.json
+    python -m benchmarks.suite compare benchmarks/baseline.json reports/benchmark_results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import pickle
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import SAMPLE_CUSTOMER, percentiles
+
+CASES = ("single_record", "batch_throughput", "model_load", "training", "http")
+PICKLE_PATH = os.path.join("models", "best_model_pipeline.pkl")
+ARTIFACT_PATH = os.path.join("models", "best_model", "manifest.json")
+BATCH_SIZES = (1, 10, 100, 1000, 10000)
+
+
+def _latencies(fn: Callable[[], Any], repeats: int, warmup: int = 5) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return {f"{k}_ms": v for k, v in percentiles(samples).items()}
+
+
+def _load_pipeline():
+    with open(PICKLE_PATH, "rb") as f:
+        return pickle.load(f)
+
+
+def _sample_records(data_path: Optional[str], n: int) -> List[Dict[str, Any]]:
+    """``n`` customer dicts: real rows when the dataset is available, else the sample customer.
+
+    Rows with a blank TotalCharges are left out: ``/predict/batch`` rejects a
+    null there, which would leave those rows unscored in the HTTP case.
+    """
+    from src.train import find_data_file, load_and_clean_data
+
+    try:
+        df = load_and_clean_data(find_data_file(data_path)).drop(columns=["Churn"])
+    except FileNotFoundError:
+        return [dict(SAMPLE_CUSTOMER) for _ in range(n)]
+    df = df.dropna()
+    idx = np.random.default_rng(0).integers(len(df), size=n)
+    return df.iloc[idx].astype(object).to_dict(orient="records")
+
+
+def case_single_record(ns: argparse.Namespace) -> Dict[str, float]:
+    from src.compiled import compile_pipeline
+    from src.scoring import score_frame
+
+    pipeline = _load_pipeline()
+    df = pd.DataFrame([SAMPLE_CUSTOMER])
+    out = {f"pipeline_{k}": v for k, v in _latencies(lambda: pipeline.predict_proba(df), ns.repeats).items()}
+    compiled, _ = compile_pipeline(pipeline)
+    if compiled is not None:
+        lat = _latencies(lambda: compiled.score(SAMPLE_CUSTOMER), ns.repeats)
+        out.update({f"compiled_{k}": v for k, v in lat.items()})
+    # The dashboard scores one DataFrame row with whatever load_model() returned
+    dashboard_model = pipeline
+    if os.path.isfile(ARTIFACT_PATH):
+        from src.artifact import load_artifact
+
+        dashboard_model = load_artifact(ARTIFACT_PATH)
+    lat = _latencies(lambda: score_frame(dashboard_model, df), ns.repeats)
+    out.update({f"dashboard_{k}": v for k, v in lat.items()})
+    return out
+
+
+def case_batch_throughput(ns: argparse.Namespace) -> Dict[str, float]:
+    from src.compiled import compile_pipeline
+
+    pipeline = _load_pipeline()
+    compiled, _ = compile_pipeline(pipeline)
+    records = _sample_records(ns.data_path, max(BATCH_SIZES))
+    out = {}
+    for size in BATCH_SIZES:
+        batch = records[:size]
+        df = pd.DataFrame(batch)
+        # Enough repeats for ~20k rows per measurement, at least 3
+        repeats = max(3, min(ns.repeats, 20_000 // size))
+        p50 = _latencies(lambda: pipeline.predict_proba(df), repeats, warmup=1)["p50_ms"]
+        out[f"pipeline_batch_{size}_rows_per_s"] = size / (p50 / 1000.0)
+        if compiled is not None:
+            p50 = _latencies(lambda: compiled.predict_proba(batch), repeats, warmup=1)["p50_ms"]
+            out[f"compiled_batch_{size}_rows_per_s"] = size / (p50 / 1000.0)
+    return out
+
+
+def case_model_load(ns: argparse.Namespace) -> Dict[str, float]:
+    repeats = max(3, ns.repeats // 50)
+    out = {"pickle_load_p50_ms": _latencies(_load_pipeline, repeats, warmup=1)["p50_ms"]}
+    if os.path.isfile(ARTIFACT_PATH):
+        from src.artifact import load_artifact
+
+        out["artifact_load_p50_ms"] = _latencies(lambda: load_artifact(ARTIFACT_PATH), repeats, warmup=1)["p50_ms"]
+    return out
+
+
+def case_training(ns: argparse.Namespace) -> Dict[str, float]:
+    from sklearn.model_selection import train_test_split
+
+    from src.train import find_data_file, fit_feature_steps, load_and_clean_data, train_and_eval_models
+
+    df = load_and_clean_data(find_data_file(ns.data_path))
+    X, y = df.drop(columns=["Churn"]), df["Churn"].astype(int)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        _, _, X_train_sel, (X_test_sel,) = fit_feature_steps(X_train, y_train, X_test)
+        out = {"feature_steps_seconds": time.perf_counter() - t0}
+        results, _ = train_and_eval_models(
+            X_train_sel, X_test_sel, y_train, y_test, jobs=1, X_train=X_train, X_test=X_test,
+        )
+    out.update({f"{r['model']}_fit_seconds": r["fit_seconds"] for r in results})
+    out["rows"] = len(df)
+    return out
+
+
+def case_http(ns: argparse.Namespace) -> Dict[str, float]:
+    from fastapi.testclient import TestClient
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        from api import app as api
+    if api.store.current is None:
+        raise RuntimeError("No trained model found; run `python -m src.train` first.")
+    # Every request repeats the same customer; measure inference, not cache hits
+    api.cache = None
+    batch = _sample_records(ns.data_path, 100)
+    out = {}
+    with TestClient(api.app) as client:
+        def predict():
+            client.post("/predict", json=SAMPLE_CUSTOMER).raise_for_status()
+
+        def predict_batch():
+            resp = client.post("/predict/batch", json=batch)
+            resp.raise_for_status()
+            body = resp.json()
+            if body["n_scored"] != len(batch):
+                raise RuntimeError(f"/predict/batch scored {body['n_scored']} of {len(batch)} rows: {body['results']}")
+
+        out.update({f"predict_{k}": v for k, v in _latencies(predict, ns.repeats).items()})
+        repeats = max(10, ns.repeats // 10)
+        out.update({f"predict_batch_100_{k}": v for k, v in _latencies(predict_batch, repeats).items()})
+    return out
+
+
+def _meta() -> Dict[str, Any]:
+    import sklearn
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def lower_is_better(metric: str) -> Optional[bool]:
+    if metric.endswith(("_ms", "_seconds")):
+        return True
+    if metric.endswith("_per_s"):
+        return False
+    return None  # informational (row counts etc.)
+
+
+def _delta_ms(metric: str, delta: float) -> float:
+    return delta * 1000.0 if metric.endswith("_seconds") else delta
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float, min_delta_ms: float = 0.1,
+) -> List[Dict[str, Any]]:
+    """One row per metric present in both runs, with ``regressed`` set past both thresholds."""
+    rows = []
+    for case, metrics in current["cases"].items():
+        for metric, value in metrics.items():
+            base = baseline.get("cases", {}).get(case, {}).get(metric)
+            direction = lower_is_better(metric)
+            if base is None or direction is None or not base:
+                continue
+            change = (value - base) / abs(base)
+            worse = change if direction else -change
+            material = not direction or _delta_ms(metric, value - base) > min_delta_ms
+            rows.append({
+                "case": case, "metric": metric, "baseline": base, "current": value,
+                "change": change, "regressed": worse > tolerance and material,
+            })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], tolerance: float) -> int:
+    print(f"{'case':<18}{'metric':<42}{'baseline':>12}{'current':>12}{'change':>9}")
+    for r in rows:
+        flag = "  REGRESSION" if r["regressed"] else ""
+        print(f"{r['case']:<18}{r['metric']:<42}{r['baseline']:>12.3f}{r['current']:>12.3f}{r['change']:>+9.1%}{flag}")
+    regressions = [r for r in rows if r["regressed"]]
+    print(f"\n{len(regressions)} regression(s) beyond {tolerance:.0%} in {len(rows)} compared metrics")
+    return 1 if regressions else 0
+
+
+def run(ns: argparse.Namespace) -> int:
+    if not os.path.isfile(PICKLE_PATH):
+        raise SystemExit(f"{PICKLE_PATH} not found; run `python -m src.train` first.")
+    if ns.quick:
+        ns.repeats = min(ns.repeats, 100)
+    result = {"meta": _meta(), "cases": {}}
+    result["meta"]["repeats"] = ns.repeats
+    for case in ns.cases:
+        print(f"Running {case} ...", flush=True)
+        t0 = time.perf_counter()
+        try:
+            result["cases"][case] = globals()[f"case_{case}"](ns)
+        except (FileNotFoundError, RuntimeError, ImportError) as e:
+            print(f"  skipped: {e}")
+            continue
+        print(f"  done in {time.perf_counter() - t0:.1f}s")
+        for metric, value in result["cases"][case].items():
+            print(f"  {metric:<44}{value:>14.3f}")
+
+    os.makedirs(os.path.dirname(ns.out) or ".", exist_ok=True)
+    with open(ns.out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {ns.out}")
+
+    if ns.baseline:
+        with open(ns.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {ns.baseline}:")
+        return print_comparison(compare(baseline, result, ns.tolerance, ns.min_delta_ms), ns.tolerance)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Run the benchmark cases and write JSON results.")
+    p_run.add_argument("--cases", nargs="+", default=list(CASES), choices=CASES)
+    p_run.add_argument("--data-path", default=None, help="Telco CSV for the training and batch cases.")
+    p_run.add_argument("--repeats", type=int, default=500, help="Timed calls per latency measurement.")
+    p_run.add_argument("--quick", action="store_true", help="At most 100 repeats, for smoke runs.")
+    p_run.add_argument("--out", default=os.path.join("reports", "benchmark_results.json"))
+    p_run.add_argument("--baseline", default=None, help="Compare against this results file after the run.")
+    p_run.add_argument("--tolerance", type=float, default=0.2, help="Relative slowdown that counts as a regression.")
+    p_run.add_argument("--min-delta-ms", type=float, default=0.1, help="Ignore timing changes smaller than this.")
+
+    p_cmp = sub.add_parser("compare", help="Flag regressions of CURRENT against BASELINE.")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--tolerance", type=float, default=0.2, help="Relative slowdown that counts as a regression.")
+    p_cmp.add_argument("--min-delta-ms", type=float, default=0.1, help="Ignore timing changes smaller than this.")
+
+    ns = parser.parse_args(argv)
+    if ns.command == "run":
+        return run(ns)
+    with open(ns.baseline) as f:
+        baseline = json.load(f)
+    with open(ns.current) as f:
+        current = json.load(f)
+    return print_comparison(compare(baseline, current, ns.tolerance, ns.min_delta_ms), ns.tolerance)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,9 +3,19 @@ import pandas as pd
 import numpy as np
 import pickle
 import os
+import sys
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+# Make the project root importable so the shared ``src`` modules resolve
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.artifact import load_artifact, stale_source
+from src.compiled import compile_pipeline
+from src.scoring import RISK_HIGH_THRESHOLD, RISK_MEDIUM_THRESHOLD, score_frame
+
 st.set_page_config(
     page_title="Customer Churn Analytics | Professional Dashboard", 
     page_icon="🎯",
@@ -415,11 +425,18 @@ st.markdown("""
 
 @st.cache_resource
 def load_model():
+    artifact = os.path.join("models", "best_model", "manifest.json")
+    # Skip an artifact exported from an older version of the pickle
+    if os.path.isfile(artifact) and stale_source(artifact) is None:
+        return load_artifact(artifact)
     candidates = [os.path.join("models", "best_model_pipeline.pkl"), "best_model_pipeline.pkl"]
     for p in candidates:
         if os.path.isfile(p):
             with open(p, "rb") as f:
-                return pickle.load(f)
+                pipeline = pickle.load(f)
+            # NumPy scorer (flat trees for forests/boosting) when it reproduces the pipeline exactly
+            compiled, _ = compile_pipeline(pipeline)
+            return compiled if compiled is not None else pipeline
     return None
 
 model = load_model()
@@ -813,8 +830,9 @@ if submitted:
         st.error("Model not loaded.")
     else:
         try:
-            pred = int(model.predict(input_df)[0])
-            proba = float(model.predict_proba(input_df)[0][1])
+            result = score_frame(model, input_df)[0]
+            pred = int(result.churn_prediction)
+            proba = result.churn_probability
             
             # Professional Results Section
             st.markdown("---")
@@ -835,11 +853,11 @@ if submitted:
                     churn_class = "prediction-result-success"
                 
                 # Risk level styling
-                if proba > 0.7:
+                if result.risk_level == "High":
                     risk_class = "risk-high"
                     risk_text = "HIGH RISK"
                     risk_icon = "fas fa-exclamation-circle"
-                elif proba > 0.3:
+                elif result.risk_level == "Medium":
                     risk_class = "risk-medium"
                     risk_text = "MEDIUM RISK"
                     risk_icon = "fas fa-exclamation-triangle"
@@ -928,14 +946,14 @@ if submitted:
                     'borderwidth': 2,
                     'bordercolor': "#e2e8f0",
                     'steps': [
-                        {'range': [0, 30], 'color': "#dcfce7"},
-                        {'range': [30, 70], 'color': "#fef3c7"},
-                        {'range': [70, 100], 'color': "#fee2e2"}
+                        {'range': [0, RISK_MEDIUM_THRESHOLD * 100], 'color': "#dcfce7"},
+                        {'range': [RISK_MEDIUM_THRESHOLD * 100, RISK_HIGH_THRESHOLD * 100], 'color': "#fef3c7"},
+                        {'range': [RISK_HIGH_THRESHOLD * 100, 100], 'color': "#fee2e2"}
                     ],
                     'threshold': {
                         'line': {'color': "#ef4444", 'width': 4},
                         'thickness': 0.75,
-                        'value': 70
+                        'value': RISK_HIGH_THRESHOLD * 100
                     }
                 }
             ))
@@ -955,7 +973,7 @@ if submitted:
             </div>
             """, unsafe_allow_html=True)
             
-            if proba > 0.7:
+            if result.risk_level == "High":
                 st.markdown(f"""
                 <div class="recommendation-card recommendation-high">
                     <h4><i class="fas fa-exclamation-triangle"></i> HIGH RISK - Immediate Action Required</h4>
@@ -968,7 +986,7 @@ if submitted:
                     </ul>
                 </div>
                 """, unsafe_allow_html=True)
-            elif proba > 0.3:
+            elif result.risk_level == "Medium":
                 st.markdown(f"""
                 <div class="recommendation-card recommendation-medium">
                     <h4><i class="fas fa-eye"></i> MEDIUM RISK - Proactive Monitoring</h4>
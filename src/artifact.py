@@ -0,0 +1,312 @@
+"""Pickle-free model artifact: a JSON manifest plus raw ``.npy`` arrays.
+
+Layout of an artifact directory::
+
+    manifest.json              columns, categories, estimator kind, array index
+    num_fill-<hash>.npy        imputer medians
+    num_mean-<hash>.npy        scaler means
+    num_scale-<hash>.npy       scaler scales
+    support-<hash>.npy         SelectKBest mask
+    coef-<hash>.npy ...        estimator parameters (linear weights or flat trees)
+
+Arrays are loaded with ``np.load(mmap_mode="r", allow_pickle=False)`` and used
+in place, so loading is a handful of ``mmap`` calls, pages are shared between
+processes through the page cache, and nothing in the directory can execute
+code. Blob names carry their content hash and the manifest is replaced last,
+so a reader never sees a half-written artifact and the manifest's own hash
+identifies the whole model. The manifest also records the hash of the pickle
+it was exported from; once that pickle changes, ``stale_source`` reports the
+artifact as out of date so loaders use the new pickle instead. A save keeps the blobs of the manifest it
+replaces, so a reader that opened that manifest just before can still load
+it; older blobs are deleted.
+
+Supported estimators: binary LogisticRegression (or log-loss SGDClassifier),
+RandomForestClassifier and GradientBoostingClassifier (log-loss with the
+default prior init), behind the preprocessor/selector layout
+``CompiledScorer`` understands.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import pickle
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+from src.compiled import (
+    CompiledScorer, TreeEnsemble, UnsupportedPipelineError, is_binary_logistic, tree_ensemble_arrays,
+)
+from src.hashing import cached_file_sha256, file_sha256
+
+ARTIFACT_FORMAT = "churn-model-artifact"
+ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+# Every array an artifact must provide, per estimator kind
+_COMMON_ARRAYS = ("num_fill", "num_mean", "num_scale", "support")
+_ESTIMATOR_ARRAYS = {
+    "logistic": ("coef", "intercept"),
+    "forest": ("tree_offsets", "children_left", "children_right", "feature", "threshold", "node_value"),
+    "boosting": ("tree_offsets", "children_left", "children_right", "feature", "threshold", "node_value"),
+}
+
+
+def is_artifact(path: str) -> bool:
+    return os.path.basename(path) == MANIFEST_NAME or os.path.isfile(os.path.join(path, MANIFEST_NAME))
+
+
+def _manifest_path(path: str) -> str:
+    return path if os.path.basename(path) == MANIFEST_NAME else os.path.join(path, MANIFEST_NAME)
+
+
+def _estimator_parts(estimator: Any) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """(manifest entry, arrays) describing ``estimator``."""
+    if isinstance(estimator, (LogisticRegression, SGDClassifier)):
+        if not is_binary_logistic(estimator):
+            raise UnsupportedPipelineError("Only binary log-loss linear classifiers are supported")
+        return {"kind": "logistic"}, {"coef": estimator.coef_[0], "intercept": estimator.intercept_}
+
+    if isinstance(estimator, (RandomForestClassifier, GradientBoostingClassifier)):
+        kind, init_raw, arrays = tree_ensemble_arrays(estimator)
+        return ({"kind": kind, "init_raw": init_raw} if kind == "boosting" else {"kind": kind}), arrays
+
+    raise UnsupportedPipelineError(f"No artifact format for {type(estimator).__name__}")
+
+
+def _build_scorer(manifest: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> CompiledScorer:
+    if manifest.get("format") != ARTIFACT_FORMAT or manifest.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        raise UnsupportedPipelineError(
+            f"Not a {ARTIFACT_FORMAT} v{ARTIFACT_FORMAT_VERSION} manifest: "
+            f"{manifest.get('format')!r} v{manifest.get('format_version')!r}"
+        )
+    est = manifest["estimator"]
+    kind = est.get("kind")
+    if kind not in _ESTIMATOR_ARRAYS:
+        raise UnsupportedPipelineError(f"Unknown estimator kind {kind!r}")
+    missing = [n for n in _COMMON_ARRAYS + _ESTIMATOR_ARRAYS[kind] if n not in arrays]
+    if missing:
+        raise UnsupportedPipelineError(f"Artifact is missing arrays: {missing}")
+
+    classes = np.asarray(manifest["classes"])
+    support = arrays["support"]
+    n_selected = int(np.count_nonzero(support))
+    if kind == "logistic":
+        coef = arrays["coef"]
+        if coef.shape != (n_selected,):
+            raise UnsupportedPipelineError(f"coef has shape {coef.shape}, expected ({n_selected},)")
+        # A bare LogisticRegression is only a holder here: CompiledScorer reads coef_/intercept_
+        estimator: Any = LogisticRegression()
+        estimator.coef_ = coef.reshape(1, -1)
+        estimator.intercept_ = arrays["intercept"]
+        estimator.classes_ = classes
+        estimator.n_features_in_ = n_selected
+    else:
+        estimator = TreeEnsemble(
+            kind,
+            classes,
+            **{n: arrays[n] for n in _ESTIMATOR_ARRAYS[kind]},
+            init_raw=est.get("init_raw", 0.0),
+        )
+        estimator.validate(n_selected)
+
+    pre = manifest["preprocessor"]
+    return CompiledScorer(
+        numeric_cols=pre["numeric_cols"],
+        num_fill=arrays["num_fill"],
+        num_mean=arrays["num_mean"],
+        num_scale=arrays["num_scale"],
+        categorical_cols=pre["categorical_cols"],
+        cat_fill=pre["cat_fill"],
+        categories=pre["categories"],
+        support=support,
+        estimator=estimator,
+        classes=classes,
+    )
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _plain(value: Any) -> Any:
+    # NumPy scalars -> Python scalars for JSON
+    return value.item() if hasattr(value, "item") else value
+
+
+def save_artifact(pipeline: Any, out_dir: str, atol: float = 1e-9, source_path: Optional[str] = None) -> str:
+    """Write ``pipeline`` as an artifact directory and return the manifest path.
+
+    ``source_path`` is the pickle ``pipeline`` was saved to; its hash goes in the
+    manifest so a later, different pickle at that path supersedes the artifact.
+
+    Raises ``UnsupportedPipelineError`` if the pipeline can't be represented,
+    and ``ValueError`` if the artifact doesn't reproduce ``pipeline.predict_proba``
+    within ``atol`` (nothing is published in either case).
+    """
+    scorer = CompiledScorer.from_pipeline(pipeline)
+    est_meta, arrays = _estimator_parts(scorer.estimator)
+    arrays.update(
+        num_fill=scorer.num_fill,
+        num_mean=scorer.num_mean,
+        num_scale=scorer.num_scale,
+        support=scorer.support,
+    )
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+
+    manifest: Dict[str, Any] = {
+        "format": ARTIFACT_FORMAT,
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "classes": [_plain(c) for c in scorer.classes_],
+        "preprocessor": {
+            "numeric_cols": scorer.numeric_cols,
+            "categorical_cols": scorer.categorical_cols,
+            "cat_fill": [_plain(v) for v in scorer.cat_fill],
+            "categories": [[_plain(v) for v in cats] for cats in scorer.categories],
+        },
+        "estimator": {**est_meta, "type": type(scorer.estimator).__name__},
+        "arrays": {},
+    }
+    if source_path is not None:
+        manifest["source"] = {
+            "file": os.path.relpath(os.path.abspath(source_path), os.path.abspath(out_dir)),
+            "sha256": file_sha256(source_path),
+        }
+
+    # Check the round trip in memory before anything touches the target directory
+    ok, max_diff = _build_scorer(json.loads(json.dumps(manifest)), arrays).verify(pipeline, atol=atol)
+    if not ok:
+        raise ValueError(f"Artifact does not match the pipeline (max abs diff {max_diff:.3g})")
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name, arr in arrays.items():
+        buf = io.BytesIO()
+        np.save(buf, arr, allow_pickle=False)
+        data = buf.getvalue()
+        digest = hashlib.sha256(data).hexdigest()
+        fname = f"{name}-{digest[:12]}.npy"
+        if not os.path.isfile(os.path.join(out_dir, fname)):
+            _atomic_write(os.path.join(out_dir, fname), data)
+        manifest["arrays"][name] = {"file": fname, "sha256": digest, "dtype": arr.dtype.str, "shape": list(arr.shape)}
+
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    previous = _referenced_files(path)
+    _atomic_write(path, json.dumps(manifest, indent=2).encode("utf-8"))
+
+    # Older generations only; processes that still map their blobs keep the pages
+    _remove_blobs(out_dir, keep={entry["file"] for entry in manifest["arrays"].values()} | previous)
+    return path
+
+
+def _referenced_files(manifest_path: str) -> Set[str]:
+    """Blob names listed by ``manifest_path``; empty if it's missing or unreadable."""
+    try:
+        with open(manifest_path, "rb") as f:
+            manifest = json.loads(f.read().decode("utf-8"))
+        return {entry["file"] for entry in manifest.get("arrays", {}).values()}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return set()
+
+
+def _remove_blobs(out_dir: str, keep: Set[str]) -> None:
+    for fname in os.listdir(out_dir):
+        if fname.endswith(".npy") and fname not in keep:
+            try:
+                os.unlink(os.path.join(out_dir, fname))
+            except FileNotFoundError:
+                pass
+
+
+def remove_artifact(path: str) -> bool:
+    """Unpublish the artifact at ``path`` (directory or manifest) and delete its blobs.
+
+    Returns whether there was a manifest to remove. The manifest goes first, so
+    new readers fall back to other model files instead of a half-deleted artifact.
+    """
+    manifest_path = _manifest_path(path)
+    if not os.path.isfile(manifest_path):
+        return False
+    os.remove(manifest_path)
+    _remove_blobs(os.path.dirname(os.path.abspath(manifest_path)), keep=set())
+    return True
+
+
+def stale_source(path: str) -> Optional[str]:
+    """The pickle this artifact was exported from, if that file has changed since; else None.
+
+    Artifacts without a recorded source, or whose source pickle is gone, are
+    never stale.
+    """
+    manifest_path = _manifest_path(path)
+    try:
+        with open(manifest_path, "rb") as f:
+            source = json.loads(f.read().decode("utf-8")).get("source")
+        src = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(manifest_path)), source["file"]))
+        expected = source["sha256"]
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    if not os.path.isfile(src):
+        return None
+    return src if cached_file_sha256(src) != expected else None
+
+
+def load_artifact(path: str, mmap: bool = True, verify_hashes: bool = False) -> CompiledScorer:
+    """Load an artifact directory (or its manifest.json) into a ``CompiledScorer``.
+
+    With ``mmap`` the arrays stay memory-mapped read-only and are used without
+    copying. ``verify_hashes`` re-reads every blob to check its sha256.
+    """
+    manifest_path = _manifest_path(path)
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, "rb") as f:
+        manifest = json.loads(f.read().decode("utf-8"))
+
+    arrays: Dict[str, np.ndarray] = {}
+    for name, entry in manifest.get("arrays", {}).items():
+        fname = entry["file"]
+        if os.path.basename(fname) != fname or not fname.endswith(".npy"):
+            raise UnsupportedPipelineError(f"Refusing array path {fname!r} outside the artifact")
+        fpath = os.path.join(base, fname)
+        if verify_hashes:
+            with open(fpath, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            if digest != entry["sha256"]:
+                raise UnsupportedPipelineError(f"Checksum mismatch for {fname}")
+        arr = np.load(fpath, mmap_mode="r" if mmap else None, allow_pickle=False)
+        if arr.dtype.str != entry["dtype"] or list(arr.shape) != entry["shape"]:
+            raise UnsupportedPipelineError(f"{fname} is {arr.dtype.str}{list(arr.shape)}, manifest says "
+                                           f"{entry['dtype']}{entry['shape']}")
+        arrays[name] = arr
+    return _build_scorer(manifest, arrays)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Convert a pickled pipeline into a memory-mappable artifact.")
+    parser.add_argument("pickle_path", nargs="?", default=os.path.join("models", "best_model_pipeline.pkl"))
+    parser.add_argument("out_dir", nargs="?", default=os.path.join("models", "best_model"))
+    ns = parser.parse_args(args)
+
+    with open(ns.pickle_path, "rb") as f:
+        pipeline = pickle.load(f)
+    try:
+        path = save_artifact(pipeline, ns.out_dir, source_path=ns.pickle_path)
+    except (UnsupportedPipelineError, ValueError) as e:
+        print(f"Could not write artifact: {e}")
+        return 1
+    print(f"Wrote {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
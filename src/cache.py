@@ -0,0 +1,139 @@
+import hashlib
+import json
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Rough per-entry bookkeeping cost of the OrderedDict node and tuple wrapper
+_ENTRY_OVERHEAD_BYTES = 160
+
+
+def _canonical_value(v: Any) -> Any:
+    if isinstance(v, bool) or v is None or isinstance(v, str):
+        return v
+    if isinstance(v, (int, float)):
+        f = float(v)
+        if math.isnan(f):
+            return "NaN"
+        # 5 and 5.0 are the same input to the pipeline
+        return int(f) if f.is_integer() else repr(f)
+    if hasattr(v, "item"):  # NumPy scalars
+        return _canonical_value(v.item())
+    return str(v)
+
+
+def _approx_size(key: str, value: Any) -> int:
+    size = sys.getsizeof(key) + sys.getsizeof(value) + _ENTRY_OVERHEAD_BYTES
+    for attr in getattr(value, "__dict__", {}).values():
+        size += sys.getsizeof(attr)
+    return size
+
+
+class PredictionCache:
+    """In-process LRU cache of scoring results keyed on canonical customer payloads.
+
+    Keys hash the sorted, type-normalised record fields together with the model
+    version, so a new model never sees results from the old one; ``set_model_version``
+    also drops the stale entries eagerly. Entries are evicted least-recently-used
+    once ``max_entries`` or the approximate ``max_bytes`` budget is exceeded, and
+    expire after ``ttl_seconds`` when set.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 100_000,
+        ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        model_version: str = "",
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds or None
+        self.max_bytes = max_bytes or None
+        self.model_version = model_version
+
+        self._data: "OrderedDict[str, Tuple[Any, Optional[float], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def make_key(self, record: Dict[str, Any]) -> str:
+        canonical = {k: _canonical_value(record[k]) for k in sorted(record)}
+        payload = json.dumps([self.model_version, canonical], separators=(",", ":"), sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, _ = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        size = _approx_size(key, value)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+            while self._data and (
+                len(self._data) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def set_model_version(self, version: str) -> None:
+        """Switch to a new model version, dropping everything cached for the old one."""
+        if version == self.model_version:
+            return
+        self.model_version = version
+        self.clear()
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_version": self.model_version,
+                "entries": len(self._data),
+                "approx_bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
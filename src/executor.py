@@ -0,0 +1,179 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from src.artifact import is_artifact, load_artifact
+from src.compiled import CompiledScorer, compile_pipeline
+
+EXECUTOR_MODES = ("auto", "inline", "thread", "process")
+
+# (path, version) -> model loaded in this process-pool worker
+ModelRef = Tuple[str, str]
+_WORKER_MODEL = None
+_WORKER_REF: Optional[ModelRef] = None
+
+
+def _init_worker(model_ref: Optional[ModelRef], use_compiled: bool = False) -> None:
+    global _WORKER_MODEL, _WORKER_REF
+    if model_ref is None:
+        return
+    if is_artifact(model_ref[0]):
+        # Memory-mapped, so workers share the arrays through the page cache
+        model = load_artifact(model_ref[0])
+    else:
+        with open(model_ref[0], "rb") as f:
+            model = pickle.load(f)
+        if use_compiled:
+            compiled, _ = compile_pipeline(model)
+            model = compiled or model
+    _WORKER_MODEL, _WORKER_REF = model, model_ref
+
+
+def _worker_ref() -> Optional[ModelRef]:
+    return _WORKER_REF
+
+
+def _call_with_worker_model(fn: Callable[..., Any], model_ref: ModelRef, use_compiled: bool, *args: Any) -> Any:
+    # Only when a call races a pool replacement: the worker predates the swap, so catch up first
+    if _WORKER_REF != model_ref:
+        _init_worker(model_ref, use_compiled)
+    return fn(_WORKER_MODEL, *args)
+
+
+class InferenceExecutor:
+    """Run blocking model calls off the asyncio event loop.
+
+    Modes:
+      - ``inline``: call on the loop thread (previous behaviour, no isolation)
+      - ``thread``: thread pool sharing the in-process model
+      - ``auto``: inline while the model is a ``CompiledScorer`` and the call
+        has at most ``inline_max_rows`` rows, the thread pool otherwise. A
+        compiled single-row score takes microseconds, less than the hand-off
+        to a thread costs; the sklearn pipeline takes milliseconds and would
+        stall the loop
+      - ``process``: process pool, each worker unpickles the model once (and
+        compiles it when ``use_compiled`` is set), reloading when
+        ``model_ref_getter`` reports a new (path, version)
+
+    ``run(fn, *args)`` calls ``fn(model, *args)``; in process mode ``fn`` must be
+    a module-level function so it can be pickled by reference. At most
+    ``max_pending`` calls are in flight at once; extra callers wait their turn
+    instead of piling work onto the pool. ``reload()`` moves process workers
+    onto a newly swapped model right away.
+    """
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        model_getter: Optional[Callable[[], Any]] = None,
+        model_ref_getter: Optional[Callable[[], Optional[ModelRef]]] = None,
+        use_compiled: bool = False,
+        mp_start_method: str = "spawn",
+        inline_max_rows: int = 256,
+    ):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode {mode!r}; expected one of {EXECUTOR_MODES}")
+        if mode == "process" and model_ref_getter is None:
+            raise ValueError("Process mode needs model_ref_getter so workers can load the pipeline.")
+        if mode != "process" and model_getter is None:
+            raise ValueError(f"{mode!r} mode needs model_getter to reach the in-process model.")
+
+        self.mode = mode
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max_pending or 2 * self.max_workers
+        self.model_getter = model_getter
+        self.model_ref_getter = model_ref_getter
+        self.use_compiled = use_compiled
+        self.mp_start_method = mp_start_method
+        self.inline_max_rows = inline_max_rows
+
+        self._pool: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._inline_calls = 0
+        self._closed = False
+
+    def _ensure_pool(self) -> Optional[Executor]:
+        if self._pool is None and self.mode != "inline":
+            if self.mode in ("thread", "auto"):
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+            else:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.mp_start_method),
+                    initializer=_init_worker,
+                    initargs=(self.model_ref_getter(), self.use_compiled),
+                )
+        return self._pool
+
+    def start(self) -> None:
+        """Create the pool eagerly; process workers start and load the model right away."""
+        self._ensure_pool()
+        self._warm_workers()
+
+    def _warm_workers(self) -> None:
+        if self.mode == "process" and self._pool is not None:
+            # Each submit that finds no idle worker starts one, whose initializer loads the model
+            for _ in range(self.max_workers):
+                self._pool.submit(_worker_ref)
+
+    def reload(self) -> None:
+        """Replace the process pool with one whose workers load the current model.
+
+        Calls already handed to the old pool finish there on the previous
+        model; the old workers exit once they're done. No-op in other modes.
+        """
+        if self.mode != "process" or self._pool is None or self._closed:
+            return
+        old, self._pool = self._pool, None
+        self._ensure_pool()
+        self._warm_workers()
+        old.shutdown(wait=False)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._closed:
+            raise RuntimeError("Inference executor has been shut down.")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+
+        async with self._semaphore:
+            self._in_flight += 1
+            try:
+                if self.mode == "inline":
+                    return fn(self.model_getter(), *args)
+                if self.mode == "auto":
+                    model = self.model_getter()
+                    # First argument is the rows for the scoring functions the API passes
+                    n_rows = len(args[0]) if args and hasattr(args[0], "__len__") else 0
+                    if isinstance(model, CompiledScorer) and n_rows <= self.inline_max_rows:
+                        self._inline_calls += 1
+                        return fn(model, *args)
+                loop = asyncio.get_running_loop()
+                pool = self._ensure_pool()
+                if self.mode in ("thread", "auto"):
+                    return await loop.run_in_executor(pool, fn, self.model_getter(), *args)
+                return await loop.run_in_executor(
+                    pool, _call_with_worker_model, fn, self.model_ref_getter(), self.use_compiled, *args
+                )
+            finally:
+                self._in_flight -= 1
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._closed = True
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": self._in_flight,
+            **({"inline_calls": self._inline_calls} if self.mode == "auto" else {}),
+        }
@@ -0,0 +1,27 @@
+"""Content hashes shared by model loading and the ingest cache."""
+import hashlib
+import os
+from typing import Dict, Tuple
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+_SHA256_CACHE: Dict[str, Tuple[int, int, str]] = {}
+
+
+def cached_file_sha256(path: str) -> str:
+    """``file_sha256`` that only re-reads ``path`` when its size or mtime changed (for polling)."""
+    st = os.stat(path)
+    key = os.path.abspath(path)
+    hit = _SHA256_CACHE.get(key)
+    if hit is not None and hit[:2] == (st.st_mtime_ns, st.st_size):
+        return hit[2]
+    digest = file_sha256(path)
+    _SHA256_CACHE[key] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
@@ -0,0 +1,108 @@
+"""Lookup-table scoring for binary logistic models over the Telco features.
+
+Behind the training preprocessing a linear model's logit is additive per
+input field: each categorical level adds the coefficient of its (selected)
+one-hot column, or nothing, and each selected numeric column adds
+``coef * (x - mean) / scale`` after median imputation. ``LinearLookup``
+precomputes those terms into one dict per field, so a customer dict is scored
+with a few dict lookups and float operations and no NumPy matrix, and the
+per-field terms double as the score's contribution breakdown.
+"""
+import math
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+class LinearLookup:
+    """``logit = intercept + sum of per-field terms``, with the terms in plain dicts."""
+
+    def __init__(
+        self,
+        intercept: float,
+        numeric: List[Tuple[str, float, float, float, float]],
+        categorical: List[Tuple[str, Any, Dict[Any, float]]],
+    ):
+        self.intercept = float(intercept)
+        # (column, median fill, mean, scale, coefficient) for every selected numeric column
+        self.numeric = numeric
+        # (column, most-frequent fill, level -> coefficient) for every column with a selected level
+        self.categorical = categorical
+
+    @classmethod
+    def from_tables(
+        cls,
+        numeric_cols: List[str],
+        num_fill: np.ndarray,
+        num_mean: np.ndarray,
+        num_scale: np.ndarray,
+        categorical_cols: List[str],
+        cat_fill: List[Any],
+        categories: List[List[Any]],
+        support: np.ndarray,
+        coef: np.ndarray,
+        intercept: float,
+    ) -> "LinearLookup":
+        """Fold the fitted imputer/scaler statistics, one-hot levels and SelectKBest mask into the tables."""
+        n_num = len(numeric_cols)
+        full_coef = np.zeros(support.shape[0])
+        full_coef[support] = coef
+        numeric = [
+            (col, float(num_fill[j]), float(num_mean[j]), float(num_scale[j]), float(full_coef[j]))
+            for j, col in enumerate(numeric_cols)
+            if support[j]
+        ]
+        categorical = []
+        offset = n_num
+        for col, fill, cats in zip(categorical_cols, cat_fill, categories):
+            table = {level: float(full_coef[offset + i]) for i, level in enumerate(cats) if support[offset + i]}
+            if table:
+                categorical.append((col, fill, table))
+            offset += len(cats)
+        return cls(intercept, numeric, categorical)
+
+    @property
+    def fields(self) -> List[str]:
+        return [n[0] for n in self.numeric] + [c[0] for c in self.categorical]
+
+    def contributions(self, record: Dict[str, Any]) -> Dict[str, float]:
+        """Each field's additive share of the logit for one customer dict."""
+        out = {}
+        for col, fill, mean, scale, weight in self.numeric:
+            v = record.get(col)
+            if v is None or v != v:
+                v = fill
+            out[col] = (v - mean) / scale * weight
+        for col, fill, table in self.categorical:
+            v = record.get(col, math.nan)
+            if v != v:  # NaN -> most frequent level, as SimpleImputer does
+                v = fill
+            out[col] = table.get(v, 0.0)
+        return out
+
+    def logit(self, record: Dict[str, Any]) -> float:
+        z = self.intercept
+        for col, fill, mean, scale, weight in self.numeric:
+            v = record.get(col)
+            if v is None or v != v:
+                v = fill
+            z += (v - mean) / scale * weight
+        for col, fill, table in self.categorical:
+            v = record.get(col, math.nan)
+            if v != v:
+                v = fill
+            z += table.get(v, 0.0)
+        return z
+
+    def score(self, record: Dict[str, Any]) -> float:
+        """Churn probability for a single customer dict."""
+        z = self.logit(record)
+        # Split on the sign so exp() can't overflow
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1.0 + e)
+
+    def predict_proba(self, records: Sequence[Dict[str, Any]]) -> np.ndarray:
+        p = np.fromiter((self.score(r) for r in records), dtype=float, count=len(records))
+        return np.column_stack([1.0 - p, p])
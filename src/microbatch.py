@@ -0,0 +1,220 @@
+import asyncio
+import inspect
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+
+ScoreFn = Callable[[List[Dict[str, Any]]], Union[List[Any], Awaitable[List[Any]]]]
+
+DEFAULT_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class BucketHistogram:
+    """Bucket histogram (non-cumulative counts) for small integer observations."""
+
+    def __init__(self, buckets: Sequence[int] = DEFAULT_SIZE_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0
+        self.sum = 0
+
+    def observe(self, value: int) -> None:
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"<={b}" for b in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.total,
+            "mean": (self.sum / self.total) if self.total else 0.0,
+        }
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-record requests into vectorized batches.
+
+    Callers ``await submit(record)``; a background task drains the queue,
+    waiting at most ``max_wait_ms`` after the first queued record or until
+    ``max_batch_size`` records are available, then calls ``score_fn`` once on
+    the whole batch and resolves each caller's future with its own result.
+    ``score_fn`` receives a list of records and must return one result per
+    record in the same order; it may be sync or async.
+
+    Each batch is scored in its own task, so up to ``max_in_flight`` batches
+    run at once (pass the executor's ``max_pending`` so batches don't queue on
+    its semaphore). While every slot is busy new records keep queueing and
+    the next batch comes out larger. ``stop()`` scores whatever is already
+    queued and waits for the batches in flight.
+    """
+
+    def __init__(
+        self, score_fn: ScoreFn, max_batch_size: int = 64, max_wait_ms: float = 5.0, max_in_flight: int = 1,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be >= 0")
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be >= 1")
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_in_flight = max_in_flight
+
+        self._queue: Optional["asyncio.Queue[Tuple[Dict[str, Any], asyncio.Future]]"] = None
+        self._task: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        # Records taken off the queue for the batch being collected, so stop() can still reach them
+        self._collecting: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._in_flight: Set[asyncio.Task] = set()
+
+        self.batch_sizes = BucketHistogram()
+        self.queue_depths = BucketHistogram((0,) + DEFAULT_SIZE_BUCKETS)
+        self.n_batches = 0
+        self.n_records = 0
+        self.n_errors = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # Score what callers are already waiting for, then let every batch finish
+        pending, self._collecting = self._collecting, []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for i in range(0, len(pending), self.max_batch_size):
+            self._dispatch(pending[i:i + self.max_batch_size])
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def submit(self, record: Dict[str, Any]) -> Any:
+        if not self.running:
+            self.start()
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, fut))
+        return await fut
+
+    async def _collect(self) -> List[Tuple[Dict[str, Any], asyncio.Future]]:
+        self._collecting = batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without yielding to the loop
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if len(batch) >= self.max_batch_size:
+                break
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        self._collecting = []
+        return batch
+
+    async def _score(self, records: List[Dict[str, Any]]) -> List[Any]:
+        out = self.score_fn(records)
+        if inspect.isawaitable(out):
+            out = await out
+        if len(out) != len(records):
+            raise RuntimeError(f"score_fn returned {len(out)} results for {len(records)} records")
+        return out
+
+    async def _run(self) -> None:
+        while True:
+            # Wait for a free slot first: records arriving meanwhile join the next batch
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            self.queue_depths.observe(self._queue.qsize())
+            self._dispatch(batch, release=True)
+
+    def _dispatch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]], release: bool = False) -> None:
+        task = asyncio.get_running_loop().create_task(self._score_batch(batch))
+        self._in_flight.add(task)
+
+        def done(t: asyncio.Task) -> None:
+            self._in_flight.discard(t)
+            if release:
+                self._slots.release()
+
+        task.add_done_callback(done)
+
+    async def _score_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        self.batch_sizes.observe(len(batch))
+        self.n_batches += 1
+        self.n_records += len(batch)
+
+        records = [rec for rec, _ in batch]
+        futures = [fut for _, fut in batch]
+        try:
+            outcomes = [(True, r) for r in await self._score(records)]
+        except asyncio.CancelledError:
+            for fut in futures:
+                if not fut.done():
+                    fut.set_exception(RuntimeError("Micro-batcher stopped before the request was scored."))
+            raise
+        except Exception as e:
+            if len(records) == 1:
+                outcomes = [(False, e)]
+            else:
+                # Re-score one by one so a single bad record only fails its own caller
+                outcomes = []
+                for rec in records:
+                    try:
+                        outcomes.append((True, (await self._score([rec]))[0]))
+                    except Exception as rec_err:
+                        outcomes.append((False, rec_err))
+
+        for fut, (ok, value) in zip(futures, outcomes):
+            if fut.done():
+                # Caller went away (e.g. client disconnected)
+                continue
+            if ok:
+                fut.set_result(value)
+            else:
+                self.n_errors += 1
+                fut.set_exception(value)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": len(self._in_flight),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.n_batches,
+            "records": self.n_records,
+            "errors": self.n_errors,
+            "batch_size_histogram": self.batch_sizes.snapshot(),
+            "queue_depth_histogram": self.queue_depths.snapshot(),
+        }
@@ -0,0 +1,192 @@
+import asyncio
+import os
+import pickle
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, List, Optional, Tuple
+
+from src.artifact import is_artifact, load_artifact, stale_source
+from src.compiled import CompiledScorer, compile_pipeline
+from src.hashing import file_sha256
+from src.scoring import score_records
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    """Immutable snapshot of one loaded model; swapped as a whole on reload."""
+
+    pipeline: Any
+    compiled: Optional[CompiledScorer]
+    compile_status: str
+    path: str
+    version: str
+    mtime: float
+    loaded_at: float
+    load_seconds: float
+
+    @property
+    def scorer(self) -> Any:
+        return self.compiled if self.compiled is not None else self.pipeline
+
+    @property
+    def scoring_path(self) -> str:
+        return "compiled" if self.compiled is not None else "pipeline"
+
+    def describe(self) -> dict:
+        return {
+            "model_path": self.path,
+            "model_version": self.version,
+            "scoring_path": self.scoring_path,
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.loaded_at)),
+            "load_seconds": round(self.load_seconds, 4),
+        }
+
+
+def load_model(path: str, use_compiled: bool = True, warmup: bool = True) -> LoadedModel:
+    """Load, optionally compile, and warm up the model at ``path``.
+
+    ``path`` is either a pickled pipeline or an artifact ``manifest.json``; the
+    manifest lists the hash of every array, so its own hash versions the model.
+    """
+    t0 = time.perf_counter()
+    mtime = os.path.getmtime(path)
+    version = file_sha256(path)[:12]
+    if is_artifact(path):
+        pipeline = None
+        compiled, status = load_artifact(path), "artifact (memory-mapped)"
+    else:
+        with open(path, "rb") as f:
+            pipeline = pickle.load(f)
+        compiled, status = (None, "disabled")
+        if use_compiled:
+            compiled, status = compile_pipeline(pipeline)
+
+    loaded = LoadedModel(
+        pipeline=pipeline,
+        compiled=compiled,
+        compile_status=status,
+        path=path,
+        version=version,
+        mtime=mtime,
+        loaded_at=time.time(),
+        load_seconds=0.0,
+    )
+    if warmup and compiled is not None:
+        # First call pays for lazy allocations; keep that off the request path
+        score_records(compiled, compiled.reference_records(n=8))
+    elif warmup and hasattr(pipeline, "feature_names_in_"):
+        score_records(pipeline, [dict.fromkeys(pipeline.feature_names_in_, float("nan"))])
+
+    return replace(loaded, load_seconds=time.perf_counter() - t0)
+
+
+class ModelStore:
+    """Holds the active model and replaces it atomically on reload.
+
+    Readers take ``store.current`` once per request and keep using that
+    snapshot, so requests already in flight finish on the old model while new
+    ones pick up the replacement. Reloads run the unpickle/compile/warm-up in a
+    worker thread and are serialised; a failed load keeps the current model.
+    """
+
+    def __init__(self, candidates: List[str], use_compiled: bool = True):
+        self.candidates = list(candidates)
+        self.use_compiled = use_compiled
+        self.current: Optional[LoadedModel] = None
+        self.last_error: Optional[str] = None
+        self.reloads = 0
+        self._on_swap: List[Callable[[LoadedModel], None]] = []
+        self._lock: Optional[asyncio.Lock] = None
+        self._warned_stale: Optional[Tuple[str, str]] = None
+
+    def on_swap(self, callback: Callable[[LoadedModel], None]) -> None:
+        self._on_swap.append(callback)
+
+    def resolve_path(self) -> Optional[str]:
+        for p in self.candidates:
+            if not os.path.isfile(p):
+                continue
+            stale = stale_source(p) if is_artifact(p) else None
+            if stale is not None:
+                # A newer pickle was dropped in; serving the old export would hide it
+                if self._warned_stale != (p, stale):
+                    self._warned_stale = (p, stale)
+                    print(f"Warning: ignoring {p}, which was exported from a previous version of {stale}")
+                continue
+            return p
+        return None
+
+    def _swap(self, loaded: LoadedModel) -> None:
+        self.current = loaded
+        for cb in self._on_swap:
+            cb(loaded)
+
+    def load_initial(self) -> Optional[LoadedModel]:
+        path = self.resolve_path()
+        if path is None:
+            return None
+        self._swap(load_model(path, use_compiled=self.use_compiled))
+        return self.current
+
+    def changed_on_disk(self) -> bool:
+        path = self.resolve_path()
+        if path is None:
+            return False
+        cur = self.current
+        return cur is None or path != cur.path or os.path.getmtime(path) != cur.mtime
+
+    async def reload(self, force: bool = False) -> Tuple[Optional[LoadedModel], bool]:
+        """Load the model from disk in the background and swap it in.
+
+        Returns ``(active model, swapped)``. Without ``force`` a file whose
+        content hash matches the active version is not swapped.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            path = self.resolve_path()
+            if path is None:
+                self.last_error = "No model file found."
+                return self.current, False
+            loop = asyncio.get_running_loop()
+            try:
+                loaded = await loop.run_in_executor(None, load_model, path, self.use_compiled)
+            except Exception as e:
+                self.last_error = f"Reload of {path} failed: {e}"
+                return self.current, False
+            return self._install(loaded, force)
+
+    def reload_now(self, force: bool = False) -> Tuple[Optional[LoadedModel], bool]:
+        """Blocking ``reload`` for callers without an event loop (the pre-fork parent)."""
+        path = self.resolve_path()
+        if path is None:
+            self.last_error = "No model file found."
+            return self.current, False
+        try:
+            loaded = load_model(path, self.use_compiled)
+        except Exception as e:
+            self.last_error = f"Reload of {path} failed: {e}"
+            return self.current, False
+        return self._install(loaded, force)
+
+    def _install(self, loaded: LoadedModel, force: bool) -> Tuple[LoadedModel, bool]:
+        self.last_error = None
+        cur = self.current
+        if not force and cur is not None and loaded.version == cur.version and loaded.path == cur.path:
+            # Same content (e.g. touched file); remember the mtime so the watcher settles
+            self.current = replace(cur, mtime=loaded.mtime)
+            return self.current, False
+        self._swap(loaded)
+        self.reloads += 1
+        return loaded, True
+
+    async def watch(self, interval: float) -> None:
+        """Poll the model file's mtime and reload when it changes."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self.changed_on_disk():
+                    await self.reload()
+            except OSError as e:
+                # File replaced mid-check; try again on the next tick
+                self.last_error = str(e)
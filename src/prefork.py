@@ -0,0 +1,332 @@
+"""Pre-forking supervisor for serving one loaded model from several workers (Linux).
+
+The parent imports the app (which unpickles and compiles the model), moves
+every live object into the GC's permanent generation with ``gc.freeze()``
+and only then forks. Workers inherit the model copy-on-write: the cyclic GC
+no longer walks (and dirties) the frozen objects, and the tree / coefficient
+arrays live in their own buffers that are never written, so those pages stay
+shared for the life of the worker. Each worker runs its own uvicorn server on
+the listening socket bound by the parent.
+
+Workers are recycled gracefully after ``max_requests`` requests (uvicorn
+finishes in-flight requests, then exits) or ``max_age_s`` seconds, and on
+SIGHUP; the replacement is forked before the old worker is told to stop.
+
+Model reloads happen in the parent, never in a worker: a worker that swapped
+its own copy would serve a different version from its siblings and lose the
+copy-on-write sharing. On SIGHUP the parent calls ``reload_model(force=True)``
+and recycles every worker. On SIGUSR2, or when ``model_changed`` reports a
+new file (polled every ``watch_s``, and before any planned recycle), it
+reloads only a changed model and recycles only if one was swapped in. A
+recycle is rolling, one worker at a time, so every worker is re-forked from
+the parent's current model. Workers ask for a reload by sending SIGHUP
+(forced) or SIGUSR2 to ``parent_pid()``.
+"""
+import gc
+import os
+import random
+import signal
+import socket
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import uvicorn
+
+# Fields reported from /proc/<pid>/smaps_rollup, in kB
+MEMORY_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+# Set in pre-forked workers: the supervisor that owns model reloads
+_PARENT_PID: Optional[int] = None
+
+
+def parent_pid() -> Optional[int]:
+    """PID of the pre-fork supervisor when running in one of its workers, else None."""
+    return _PARENT_PID
+
+
+def process_memory(pid: Optional[int] = None) -> Dict[str, int]:
+    """Resident / proportional / shared / private memory of ``pid`` in kB.
+
+    ``Pss`` splits shared pages between the processes mapping them, so summing
+    it over the parent and workers gives the real footprint; ``Private_*`` is
+    what each worker has copied or allocated for itself. Empty off Linux.
+    """
+    path = f"/proc/{pid or 'self'}/smaps_rollup"
+    out: Dict[str, int] = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in MEMORY_FIELDS:
+                    out[key] = int(rest.split()[0])
+    except (OSError, ValueError):
+        return {}
+    return out
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Worker:
+    def __init__(self, pid: int, index: int):
+        self.pid = pid
+        self.index = index
+        self.started = time.monotonic()
+        self.retiring = False
+
+
+class PreforkServer:
+    """Fork ``workers`` uvicorn servers sharing ``app`` and one listening socket."""
+
+    def __init__(
+        self,
+        app: Any,
+        host: str = "0.0.0.0",
+        port: int = 8000,
+        workers: int = 2,
+        max_requests: int = 0,
+        max_requests_jitter: int = 0,
+        max_age_s: float = 0.0,
+        graceful_timeout_s: float = 30.0,
+        memory_report_s: float = 0.0,
+        log_level: str = "info",
+        reload_model: Optional[Callable[[bool], bool]] = None,
+        model_changed: Optional[Callable[[], bool]] = None,
+        watch_s: float = 0.0,
+    ):
+        """``reload_model(force)`` reloads the parent's model and returns whether it swapped;
+        ``model_changed()`` says whether the file on disk differs from the loaded one."""
+        if not hasattr(os, "fork"):
+            raise RuntimeError("Pre-fork serving needs os.fork (Linux/macOS); run uvicorn directly instead")
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.max_age_s = max_age_s
+        self.graceful_timeout_s = graceful_timeout_s
+        self.memory_report_s = memory_report_s
+        self.log_level = log_level
+        self.reload_model = reload_model
+        self.model_changed = model_changed
+        self.watch_s = watch_s
+
+        self.sock: Optional[socket.socket] = None
+        self._workers: Dict[int, Worker] = {}
+        self._stopping = False
+        self._reload_requested = False
+        self._reload_forced = False
+        self._recycle_queue: List[int] = []
+        self._report_now = False
+        self.spawned = 0
+
+    def log(self, msg: str) -> None:
+        print(f"[prefork {os.getpid()}] {msg}", flush=True)
+
+    # ----- worker side -------------------------------------------------
+    def _worker_main(self, parent: int) -> None:
+        global _PARENT_PID
+        _PARENT_PID = parent
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGUSR1, signal.SIGUSR2):
+            signal.signal(sig, signal.SIG_DFL)
+        limit = None
+        if self.max_requests > 0:
+            # Jitter keeps workers from all restarting at the same moment
+            limit = self.max_requests + random.randint(0, max(self.max_requests_jitter, 0))
+        config = uvicorn.Config(
+            self.app,
+            log_level=self.log_level,
+            limit_max_requests=limit,
+            timeout_graceful_shutdown=self.graceful_timeout_s or None,
+        )
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def _spawn(self, index: int) -> Worker:
+        parent = os.getpid()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._worker_main(parent)
+            except BaseException:
+                code = 1
+                import traceback
+
+                traceback.print_exc()
+            finally:
+                os._exit(code)
+        w = Worker(pid, index)
+        self._workers[pid] = w
+        self.spawned += 1
+        self.log(f"started worker {index} (pid {pid})")
+        return w
+
+    # ----- parent side -------------------------------------------------
+    def _install_signals(self) -> None:
+        def stop(signum, frame):
+            self._stopping = True
+
+        def reload(signum, frame):
+            self._reload_requested = True
+            if signum == signal.SIGHUP:
+                self._reload_forced = True
+
+        def report(signum, frame):
+            self._report_now = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGHUP, reload)
+        signal.signal(signal.SIGUSR2, reload)
+        signal.signal(signal.SIGUSR1, report)
+
+    def _retire(self, worker: Worker) -> None:
+        """Fork a replacement, then ask ``worker`` to finish its requests and exit."""
+        if worker.retiring:
+            return
+        worker.retiring = True
+        self._spawn(worker.index)
+        try:
+            os.kill(worker.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def _refresh_model(self, force: bool = False) -> bool:
+        """Reload the parent's model if asked to or it changed on disk; True when a new one is in place."""
+        if self.reload_model is None:
+            return False
+        if not force and (self.model_changed is None or not self.model_changed()):
+            return False
+        swapped = self.reload_model(force)
+        if swapped:
+            # Freeze the new model like the first one so workers share its pages
+            gc.collect()
+            gc.freeze()
+            self.log("loaded a new model")
+        return swapped
+
+    def _rolling_recycle(self) -> None:
+        """Queue every current worker; ``_step_recycle`` retires them one at a time."""
+        self._recycle_queue = [pid for pid, w in self._workers.items() if not w.retiring]
+
+    def _step_recycle(self) -> None:
+        if any(w.retiring for w in self._workers.values()):
+            return
+        while self._recycle_queue:
+            w = self._workers.get(self._recycle_queue.pop(0))
+            if w is not None:
+                self._retire(w)
+                return
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            w = self._workers.pop(pid, None)
+            if w is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            self.log(f"worker {w.index} (pid {pid}) exited with {code}")
+            # Exits we didn't ask for (max_requests reached, crash) get a replacement
+            if not w.retiring and not self._stopping:
+                if code != 0:
+                    time.sleep(1.0)  # don't spin on a worker that dies at startup
+                self._spawn(w.index)
+
+    def memory_report(self) -> List[Dict[str, Any]]:
+        rows = [{"role": "parent", "pid": os.getpid(), **process_memory(os.getpid())}]
+        for w in sorted(self._workers.values(), key=lambda w: w.index):
+            rows.append({"role": f"worker {w.index}", "pid": w.pid, **process_memory(w.pid)})
+        return rows
+
+    def _log_memory(self) -> None:
+        rows = self.memory_report()
+        total_pss = sum(r.get("Pss", 0) for r in rows)
+        for r in rows:
+            private = r.get("Private_Clean", 0) + r.get("Private_Dirty", 0)
+            shared = r.get("Shared_Clean", 0) + r.get("Shared_Dirty", 0)
+            self.log(
+                f"{r['role']:>9} pid {r['pid']}: rss {r.get('Rss', 0) / 1024:.1f} MB, "
+                f"pss {r.get('Pss', 0) / 1024:.1f} MB, shared {shared / 1024:.1f} MB, private {private / 1024:.1f} MB"
+            )
+        self.log(f"total pss {total_pss / 1024:.1f} MB across {len(rows)} processes")
+
+    def _shutdown(self) -> None:
+        self.log("shutting down workers")
+        for pid in list(self._workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.graceful_timeout_s + 5.0
+        while self._workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self._workers):
+            self.log(f"killing worker pid {pid} after graceful timeout")
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        while self._workers:
+            pid, _ = os.waitpid(-1, 0)
+            self._workers.pop(pid, None)
+
+    def run(self) -> None:
+        self.sock = bind_socket(self.host, self.port)
+        self.log(f"listening on {self.host}:{self.port} with {self.workers} workers")
+        # Everything loaded so far (the model above all) is shared with the workers;
+        # keep the collector from touching those objects after fork
+        gc.collect()
+        gc.freeze()
+        self._install_signals()
+        for i in range(self.workers):
+            self._spawn(i)
+
+        last_report = last_watch = time.monotonic()
+        try:
+            while not self._stopping:
+                time.sleep(0.5)
+                self._reap()
+                now = time.monotonic()
+                if self._reload_requested:
+                    force, self._reload_requested, self._reload_forced = self._reload_forced, False, False
+                    if self._refresh_model(force=force) or force:
+                        self.log("rolling recycle of all workers")
+                        self._rolling_recycle()
+                    else:
+                        self.log("reload requested but the model is unchanged")
+                elif self.watch_s > 0 and now - last_watch >= self.watch_s:
+                    last_watch = now
+                    if self._refresh_model():
+                        self.log("model changed on disk; rolling recycle of all workers")
+                        self._rolling_recycle()
+                if self.max_age_s > 0:
+                    expired = [w for w in self._workers.values() if not w.retiring and now - w.started > self.max_age_s]
+                    if expired and self._refresh_model():
+                        self._rolling_recycle()
+                    for w in expired:
+                        if w.pid not in self._recycle_queue:
+                            self._recycle_queue.append(w.pid)
+                self._step_recycle()
+                if self._report_now or (self.memory_report_s > 0 and now - last_report >= self.memory_report_s):
+                    self._report_now = False
+                    last_report = now
+                    self._log_memory()
+        finally:
+            self._shutdown()
+            self.sock.close()
@@ -0,0 +1,165 @@
+"""Per-stage wall time, CPU time and peak memory of a training run.
+
+``StageProfiler.stage(name)`` wraps one step of ``src/train.py``; ``write``
+saves the stages to ``reports/training_profile.json``. CPU time is split into
+this process and its children (pool workers that fit candidates). On Linux
+the RSS high-water mark is reset at the start of every stage through
+``/proc/self/clear_refs``, so ``peak_rss_mb`` is that stage's own peak;
+elsewhere it is the process peak so far (``peak_rss_scope`` says which).
+Memory and child CPU come from ``resource`` on Unix and from psutil, when it
+is installed, on Windows; without either only times are recorded (memory is
+``null``, child CPU 0).
+
+With ``cprofile=True`` every stage also runs under ``cProfile`` and the
+slowest stage's profile is written next to the JSON, as a ``.prof`` file for
+pstats/snakeviz and a text summary. Pool workers are not covered; use
+``--jobs 1`` to profile candidate fits.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - optional dependency
+    psutil = None
+
+
+def _reset_peak_rss() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is not None:
+        # ru_maxrss is in kB on Linux, bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        # peak_wset is Windows' peak working set
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    return None
+
+
+def _children_cpu() -> float:
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return usage.ru_utime + usage.ru_stime
+    if psutil is not None:
+        # Only counts children that have exited, as RUSAGE_CHILDREN does
+        times = psutil.Process().cpu_times()
+        return times.children_user + times.children_system
+    return 0.0
+
+
+class StageProfiler:
+    """Records one entry per ``stage()`` block; a disabled profiler records nothing."""
+
+    def __init__(self, enabled: bool = True, cprofile: bool = False):
+        self.enabled = enabled
+        self.cprofile = enabled and cprofile
+        self.stages: List[Dict[str, Any]] = []
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._peak_scope = "process"
+        self._started = time.perf_counter()
+        self._started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    @contextmanager
+    def stage(self, name: str, **details: Any) -> Iterator[Dict[str, Any]]:
+        """Time the block; callers may add to the yielded ``details`` dict."""
+        if not self.enabled:
+            yield details
+            return
+        if _reset_peak_rss():
+            self._peak_scope = "stage"
+        elif _peak_rss_mb() is None:
+            self._peak_scope = "unavailable"
+        profile = cProfile.Profile() if self.cprofile else None
+        wall, cpu, children = time.perf_counter(), time.process_time(), _children_cpu()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield details
+        finally:
+            if profile is not None:
+                profile.disable()
+                self._profiles[name] = profile
+            entry = {
+                "name": name,
+                "wall_seconds": time.perf_counter() - wall,
+                "cpu_seconds": time.process_time() - cpu,
+                "children_cpu_seconds": _children_cpu() - children,
+                "peak_rss_mb": _peak_rss_mb(),
+            }
+            if details:
+                entry["details"] = details
+            self.stages.append(entry)
+
+    def slowest(self) -> Optional[Dict[str, Any]]:
+        return max(self.stages, key=lambda s: s["wall_seconds"], default=None)
+
+    def summary(self) -> str:
+        lines = [f"{'stage':<24}{'wall_s':>9}{'cpu_s':>9}{'child_cpu_s':>13}{'peak_rss_mb':>13}"]
+        for s in self.stages:
+            peak = f"{s['peak_rss_mb']:>13.1f}" if s["peak_rss_mb"] is not None else f"{'-':>13}"
+            lines.append(
+                f"{s['name']:<24}{s['wall_seconds']:>9.2f}{s['cpu_seconds']:>9.2f}"
+                f"{s['children_cpu_seconds']:>13.2f}{peak}"
+            )
+        return "\n".join(lines)
+
+    def write(self, path: str, argv: Optional[List[str]] = None) -> List[str]:
+        """Write the JSON report (plus the slowest stage's cProfile dump); return the paths written."""
+        if not self.enabled:
+            return []
+        written = []
+        slowest = self.slowest()
+        cprofile_path = None
+        if slowest is not None and slowest["name"] in self._profiles:
+            base = os.path.splitext(path)[0]
+            cprofile_path = f"{base}.prof"
+            stats = pstats.Stats(self._profiles[slowest["name"]])
+            stats.dump_stats(cprofile_path)
+            text = io.StringIO()
+            pstats.Stats(self._profiles[slowest["name"]], stream=text).sort_stats("cumulative").print_stats(40)
+            with open(f"{base}_top.txt", "w") as f:
+                f.write(f"cProfile of stage {slowest['name']!r}, top 40 by cumulative time\n")
+                f.write(text.getvalue())
+            written += [cprofile_path, f"{base}_top.txt"]
+
+        report = {
+            "started_at": self._started_at,
+            "argv": list(sys.argv[1:] if argv is None else argv),
+            "total_wall_seconds": time.perf_counter() - self._started,
+            "peak_rss_scope": self._peak_scope,
+            "slowest_stage": slowest["name"] if slowest else None,
+            "cprofile": cprofile_path,
+            "stages": self.stages,
+        }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        return [path] + written
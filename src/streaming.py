@@ -0,0 +1,299 @@
+"""Incremental CSV / NDJSON scoring for large uploads.
+
+Request bytes are decoded and split into lines as they arrive, grouped into
+fixed-size chunks, validated, scored and written back out chunk by chunk,
+so memory stays bounded by ``chunk_size`` (and ``max_line_chars`` per line)
+however long the upload is. A line longer than ``max_line_chars`` is skipped
+up to its newline and reported as an error row. CSV input must have a header
+row and no quoted fields spanning lines.
+"""
+import codecs
+import csv
+import io
+import json
+from urllib.parse import parse_qs
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from src.ingest import ID_COLUMNS
+from src.scoring import ScoreResult
+
+STREAM_FORMATS = ("csv", "ndjson")
+
+# Longest input line accepted; a Telco row is a few hundred characters
+DEFAULT_MAX_LINE_CHARS = 1 << 20
+
+OUTPUT_FIELDS = ["row", "customerID", "churn_prediction", "churn_probability", "risk_level", "error"]
+
+Validator = Callable[[Dict[str, Any]], Dict[str, Any]]
+Scorer = Callable[[List[Dict[str, Any]]], Awaitable[List[ScoreResult]]]
+
+
+def format_from_content_type(content_type: Optional[str]) -> str:
+    ct = (content_type or "").split(";")[0].strip().lower()
+    if ct in ("text/csv", "application/csv"):
+        return "csv"
+    return "ndjson"
+
+
+class LineTooLong(ValueError):
+    pass
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes], encoding: str = "utf-8", max_line_chars: int = DEFAULT_MAX_LINE_CHARS,
+) -> AsyncIterator[Union[str, LineTooLong]]:
+    """Yield decoded, newline-stripped lines from an async stream of byte chunks.
+
+    Only newly decoded text is split, and the unfinished line is kept as a list
+    of pieces, so each byte is handled once. A line over ``max_line_chars`` is
+    dropped as it arrives and yields a ``LineTooLong`` in its place.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pieces: List[str] = []
+    size = 0
+    too_long = False
+
+    def finish(last: str) -> Union[str, LineTooLong]:
+        nonlocal pieces, size, too_long
+        if too_long or size + len(last) > max_line_chars:
+            out: Union[str, LineTooLong] = LineTooLong(f"Line exceeds {max_line_chars} characters")
+        else:
+            pieces.append(last)
+            out = "".join(pieces).rstrip("\r")
+        pieces, size, too_long = [], 0, False
+        return out
+
+    def keep(partial: str) -> None:
+        nonlocal pieces, size, too_long
+        size += len(partial)
+        if size > max_line_chars:
+            pieces, too_long = [], True
+        elif not too_long:
+            pieces.append(partial)
+
+    async for chunk in chunks:
+        *lines, partial = decoder.decode(chunk).split("\n")
+        for line in lines:
+            yield finish(line)
+        if partial:
+            keep(partial)
+    keep(decoder.decode(b"", final=True))
+    if too_long or "".join(pieces).strip():
+        yield finish("")
+
+
+async def iter_chunks(
+    lines: AsyncIterator[Union[str, LineTooLong]], fmt: str, chunk_size: int,
+) -> AsyncIterator[List[Tuple[int, Any]]]:
+    """Group non-empty input lines into ``[(row_number, parsed_or_exception), ...]`` chunks."""
+    header: Optional[List[str]] = None
+    header_error: Optional[ValueError] = None
+    row_no = 0
+    chunk: List[Tuple[int, Any]] = []
+    async for line in lines:
+        if isinstance(line, str) and not line.strip():
+            continue
+        if fmt == "csv" and header is None and header_error is None:
+            if isinstance(line, LineTooLong):
+                # Report it once as a row; every row after it can only fail the same way
+                header_error = ValueError(f"CSV header rejected: {line}")
+                line = header_error
+            else:
+                header = next(csv.reader([line.lstrip("\ufeff")]))
+                continue
+
+        try:
+            if isinstance(line, ValueError):
+                raise line
+            if header_error is not None:
+                raise header_error
+            if fmt == "csv":
+                values = next(csv.reader([line]))
+                if len(values) != len(header):
+                    raise ValueError(f"Expected {len(header)} columns, got {len(values)}")
+                parsed: Any = dict(zip(header, values))
+            else:
+                parsed = json.loads(line)
+                if not isinstance(parsed, dict):
+                    raise ValueError("Each NDJSON line must be a JSON object")
+        except ValueError as e:
+            parsed = e
+        chunk.append((row_no, parsed))
+        row_no += 1
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _customer_id(raw: Any) -> Optional[str]:
+    if isinstance(raw, dict):
+        for col in ID_COLUMNS:
+            if col in raw and raw[col] not in (None, ""):
+                return str(raw[col])
+    return None
+
+
+def _blank_to_nan(raw: Dict[str, Any], float_fields: Sequence[str]) -> Dict[str, Any]:
+    # Exports carry blanks (e.g. TotalCharges for new customers); the pipeline imputes NaN
+    out = dict(raw)
+    for f in float_fields:
+        v = out.get(f)
+        if v is None or (isinstance(v, str) and not v.strip()):
+            out[f] = float("nan")
+    return out
+
+
+async def score_chunks(
+    chunks: AsyncIterator[List[Tuple[int, Any]]],
+    validate: Validator,
+    score: Scorer,
+    float_fields: Sequence[str] = (),
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Validate and score each chunk, yielding one output record per input row."""
+    async for chunk in chunks:
+        out: List[Dict[str, Any]] = []
+        valid_rows: List[Dict[str, Any]] = []
+        valid_pos: List[int] = []
+        for row_no, raw in chunk:
+            rec = {"row": row_no, "customerID": _customer_id(raw)}
+            if isinstance(raw, Exception):
+                rec["error"] = str(raw)
+            else:
+                try:
+                    valid_rows.append(validate(_blank_to_nan(raw, float_fields)))
+                    valid_pos.append(len(out))
+                except Exception as e:
+                    rec["error"] = str(e).replace("\n", "; ")
+            out.append(rec)
+
+        if valid_rows:
+            try:
+                results = await score(valid_rows)
+                for pos, res in zip(valid_pos, results):
+                    out[pos].update(res.to_dict())
+            except Exception as e:
+                for pos in valid_pos:
+                    out[pos]["error"] = f"Scoring failed: {e}"
+        yield out
+
+
+def render(records: Iterable[Dict[str, Any]], fmt: str, include_header: bool = False) -> str:
+    if fmt == "ndjson":
+        return "".join(json.dumps(r) + "\n" for r in records)
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=OUTPUT_FIELDS, extrasaction="ignore", lineterminator="\n")
+    if include_header:
+        writer.writeheader()
+    writer.writerows(records)
+    return buf.getvalue()
+
+
+async def stream_scores(
+    body: AsyncIterator[bytes],
+    in_fmt: str,
+    out_fmt: str,
+    validate: Validator,
+    score: Scorer,
+    chunk_size: int = 1000,
+    float_fields: Sequence[str] = (),
+    max_line_chars: int = DEFAULT_MAX_LINE_CHARS,
+) -> AsyncIterator[str]:
+    """Full pipeline: request bytes in, rendered result text out, one chunk at a time."""
+    if in_fmt not in STREAM_FORMATS or out_fmt not in STREAM_FORMATS:
+        raise ValueError(f"Formats must be one of {STREAM_FORMATS}")
+    first = True
+    chunks = iter_chunks(iter_lines(body, max_line_chars=max_line_chars), in_fmt, chunk_size)
+    async for records in score_chunks(chunks, validate, score, float_fields):
+        yield render(records, out_fmt, include_header=first)
+        first = False
+    if first and out_fmt == "csv":
+        yield render([], out_fmt, include_header=True)
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def _send_json(send: Callable, status: int, payload: Dict[str, Any]) -> None:
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class StreamScoringEndpoint:
+    """Raw ASGI endpoint that streams results back while the upload is still arriving.
+
+    Reading and scoring take turns in one task: a chunk of rows is read, then
+    scored and written, then the next chunk is read. Only one chunk is held at a
+    time and its results go out before the rest of the body has been received.
+    Starlette's StreamingResponse watches for client disconnects by calling
+    ``receive()`` itself, which would swallow the request body this endpoint is
+    still reading, so it drives ``receive``/``send`` directly instead.
+    Query parameters: ``format`` (input, defaults from Content-Type) and
+    ``output`` (defaults to the input format). If the stream fails part way
+    the 200 is already out, so a final error row is written, the response is
+    closed and the exception re-raised for the server to log.
+    """
+
+    def __init__(
+        self,
+        validate: Validator,
+        score: Scorer,
+        is_ready: Callable[[], bool],
+        chunk_size: int = 1000,
+        float_fields: Sequence[str] = (),
+        max_line_chars: int = DEFAULT_MAX_LINE_CHARS,
+    ):
+        self.validate = validate
+        self.score = score
+        self.is_ready = is_ready
+        self.chunk_size = chunk_size
+        self.float_fields = list(float_fields)
+        self.max_line_chars = max_line_chars
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if not self.is_ready():
+            await _send_json(send, 503, {"detail": "Model not loaded. Train the model first."})
+            return
+
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        in_fmt = (query.get("format", [None])[0] or format_from_content_type(headers.get("content-type"))).lower()
+        out_fmt = (query.get("output", [None])[0] or in_fmt).lower()
+        if in_fmt not in STREAM_FORMATS or out_fmt not in STREAM_FORMATS:
+            await _send_json(send, 400, {"detail": f"format/output must be one of {list(STREAM_FORMATS)}"})
+            return
+
+        async def body() -> AsyncIterator[bytes]:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    raise ClientDisconnected()
+                yield message.get("body", b"")
+                if not message.get("more_body", False):
+                    return
+
+        media_type = b"text/csv" if out_fmt == "csv" else b"application/x-ndjson"
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", media_type)]})
+        sent_any = False
+        try:
+            async for text in stream_scores(
+                body(), in_fmt, out_fmt, self.validate, self.score, self.chunk_size, self.float_fields,
+                self.max_line_chars,
+            ):
+                await send({"type": "http.response.body", "body": text.encode("utf-8"), "more_body": True})
+                sent_any = True
+        except ClientDisconnected:
+            return
+        except Exception as e:
+            error = render([{"row": None, "error": f"Stream aborted: {e}"}], out_fmt, include_header=not sent_any)
+            await send({"type": "http.response.body", "body": error.encode("utf-8"), "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            raise
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
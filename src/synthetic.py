@@ -0,0 +1,282 @@
+"""Synthetic Telco-schema datasets of any size, learned from a source CSV.
+
+``TelcoSynthesizer.fit`` reads the raw CSV as strings and learns:
+
+* the churn rate;
+* a tree over the discrete columns (categoricals plus low-cardinality numbers
+  such as ``SeniorCitizen``): the maximum spanning tree of conditional mutual
+  information given ``Churn`` (tree-augmented naive Bayes). Each column is then
+  drawn from ``P(column | Churn, parent)`` in tree order, which keeps the
+  churn correlations and the structural rules of the data, for example
+  ``InternetService == "No"`` implying ``"No internet service"`` add-ons;
+* continuous columns (``tenure``, ``MonthlyCharges``) resampled from the
+  source values within the (``Churn``, most predictive discrete column)
+  cell, with 1% multiplicative jitter on non-integer columns;
+* ``TotalCharges`` as ``tenure * MonthlyCharges * r`` with ``r`` resampled
+  from the source, left blank (with the source's blank token) at the rates
+  the source has for zero and non-zero tenure.
+
+``write_csv`` streams seeded chunks, so memory is bounded by ``chunk_size``
+whatever the row count, and a given seed always produces the same file.
+
+Usage (from the project root):
+    python -m src.synthetic --source data/Telco_Customer_Churn_Dataset.csv --rows 1000000 --out data/telco_1m.csv
+"""
+import argparse
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.ingest import ID_COLUMNS
+
+# Numeric columns with at most this many distinct values are modelled as discrete
+MAX_DISCRETE_LEVELS = 10
+JITTER = 0.01
+ID_LETTERS = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+
+
+def _codes(values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    levels, codes = np.unique(values.to_numpy(dtype=str), return_inverse=True)
+    return codes, levels
+
+
+def _conditional_mi(a: np.ndarray, b: np.ndarray, churn: np.ndarray) -> float:
+    """I(A; B | Churn) in nats, from co-occurrence counts."""
+    total = 0.0
+    for c in (0, 1):
+        rows = churn == c
+        if not rows.any():
+            continue
+        joint = pd.crosstab(a[rows], b[rows]).to_numpy(dtype=float)
+        joint /= joint.sum()
+        outer = joint.sum(axis=1, keepdims=True) * joint.sum(axis=0, keepdims=True)
+        nz = joint > 0
+        total += rows.mean() * float((joint[nz] * np.log(joint[nz] / outer[nz])).sum())
+    return total
+
+
+def _cumulative_tables(child: np.ndarray, n_child: int, cell: np.ndarray, n_cells: int) -> np.ndarray:
+    """Row-wise CDF of P(child | cell); unseen cells get the child's overall distribution."""
+    counts = np.zeros((n_cells, n_child))
+    np.add.at(counts, (cell, child), 1.0)
+    overall = np.bincount(child, minlength=n_child).astype(float)
+    counts[counts.sum(axis=1) == 0] = overall
+    probs = counts / counts.sum(axis=1, keepdims=True)
+    cdf = np.cumsum(probs, axis=1)
+    cdf[:, -1] = 1.0
+    return cdf
+
+
+def _draw(cdf_rows: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    u = rng.random(len(cdf_rows))
+    return (u[:, None] > cdf_rows).sum(axis=1)
+
+
+class _Pool:
+    """Source values grouped by cell, for resampling within a cell."""
+
+    def __init__(self, values: np.ndarray, cell: np.ndarray, n_cells: int):
+        order = np.argsort(cell, kind="stable")
+        self.values = values[order]
+        self.counts = np.bincount(cell, minlength=n_cells)
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)[:-1]])
+
+    def sample(self, cell: np.ndarray, rng: np.random.Generator, fallback: Optional["_Pool"] = None,
+               fallback_cell: Optional[np.ndarray] = None) -> np.ndarray:
+        out = np.empty(len(cell), dtype=self.values.dtype)
+        have = self.counts[cell] > 0
+        idx = self.offsets[cell[have]] + (rng.random(int(have.sum())) * self.counts[cell[have]]).astype(np.int64)
+        out[have] = self.values[idx]
+        if not have.all():
+            out[~have] = fallback.sample(fallback_cell[~have], rng)
+        return out
+
+
+class TelcoSynthesizer:
+    """Learns a Telco-style table from a source CSV and samples new rows from it."""
+
+    def __init__(self):
+        self.columns: List[str] = []
+        self.id_column: Optional[str] = None
+        self.churn_levels = np.array(["No", "Yes"])
+        self.churn_rate = 0.0
+        self.discrete: Dict[str, np.ndarray] = {}  # column -> levels
+        self.order: List[str] = []
+        self.parent: Dict[str, Optional[str]] = {}
+        self._cdf: Dict[str, np.ndarray] = {}
+        self.continuous: Dict[str, Dict] = {}
+        self.total_charges: Optional[Dict] = None
+
+    @classmethod
+    def fit(cls, source_csv: str) -> "TelcoSynthesizer":
+        raw = pd.read_csv(source_csv, dtype=str, keep_default_na=False)
+        self = cls()
+        self.columns = raw.columns.tolist()
+        self.id_column = next((c for c in self.columns if c in ID_COLUMNS), None)
+        if "Churn" not in raw.columns:
+            raise ValueError("Source CSV has no 'Churn' column")
+
+        churn_raw = raw["Churn"].str.strip()
+        churn = churn_raw.isin(["Yes", "1"]).to_numpy().astype(int)
+        self.churn_levels = np.array(["0", "1"] if churn_raw.isin(["0", "1"]).all() else ["No", "Yes"])
+        self.churn_rate = float(churn.mean())
+
+        derived = "TotalCharges" if {"tenure", "MonthlyCharges", "TotalCharges"} <= set(raw.columns) else None
+        codes: Dict[str, np.ndarray] = {}
+        for col in self.columns:
+            if col in (self.id_column, "Churn", derived):
+                continue
+            numeric = pd.to_numeric(raw[col], errors="coerce")
+            if numeric.notna().all() and numeric.nunique() > MAX_DISCRETE_LEVELS:
+                self.continuous[col] = {"values": numeric.to_numpy(), "integer": bool((numeric % 1 == 0).all())}
+            else:
+                codes[col], self.discrete[col] = _codes(raw[col])
+
+        self._fit_tree(codes, churn)
+        for col, spec in self.continuous.items():
+            self._fit_continuous(col, spec, codes, churn)
+        if derived:
+            self._fit_total_charges(raw, churn)
+        return self
+
+    def _fit_tree(self, codes: Dict[str, np.ndarray], churn: np.ndarray) -> None:
+        cols = list(codes)
+        if not cols:
+            return
+        mi = {(a, b): _conditional_mi(codes[a], codes[b], churn) for i, a in enumerate(cols) for b in cols[i + 1:]}
+        # Root: the column most informative about churn itself
+        root = max(cols, key=lambda c: _conditional_mi(codes[c], churn, np.zeros_like(churn)))
+        self.order, self.parent = [root], {root: None}
+        # Prim's algorithm on the conditional-MI graph
+        while len(self.order) < len(cols):
+            best = max(
+                ((mi.get((a, b), mi.get((b, a))), a, b) for a in self.order for b in cols if b not in self.parent),
+                key=lambda t: t[0],
+            )
+            self.order.append(best[2])
+            self.parent[best[2]] = best[1]
+        for col in self.order:
+            parent = self.parent[col]
+            n_parent = len(self.discrete[parent]) if parent else 1
+            cell = churn * n_parent + (codes[parent] if parent else 0)
+            self._cdf[col] = _cumulative_tables(codes[col], len(self.discrete[col]), cell, 2 * n_parent)
+
+    def _fit_continuous(self, col: str, spec: Dict, codes: Dict[str, np.ndarray], churn: np.ndarray) -> None:
+        values = spec["values"]
+
+        def eta2(parent: str) -> float:
+            # Correlation ratio: share of the column's variance explained by the parent's levels
+            means = pd.Series(values).groupby(codes[parent]).transform("mean").to_numpy()
+            return float(((means - values.mean()) ** 2).sum() / max(((values - values.mean()) ** 2).sum(), 1e-12))
+
+        parent = max(codes, key=eta2) if codes else None
+        n_parent = len(self.discrete[parent]) if parent else 1
+        spec["parent"] = parent
+        spec["pool"] = _Pool(values, churn * n_parent + (codes[parent] if parent else 0), 2 * n_parent)
+        spec["fallback"] = _Pool(values, churn, 2)
+        decimals = pd.Series(values).map(lambda v: len(f"{v:.10g}".partition(".")[2])).max()
+        spec["decimals"] = int(min(decimals, 6))
+
+    def _fit_total_charges(self, raw: pd.DataFrame, churn: np.ndarray) -> None:
+        total = pd.to_numeric(raw["TotalCharges"], errors="coerce").to_numpy()
+        tenure = pd.to_numeric(raw["tenure"], errors="coerce").to_numpy()
+        monthly = pd.to_numeric(raw["MonthlyCharges"], errors="coerce").to_numpy()
+        blank = np.isnan(total)
+        zero = tenure == 0
+        tokens = raw["TotalCharges"][blank].value_counts()
+        ok = ~blank & (tenure > 0) & (monthly > 0)
+        ratio = total[ok] / (tenure[ok] * monthly[ok])
+        self.total_charges = {
+            "blank_token": tokens.index[0] if len(tokens) else " ",
+            "p_blank_zero_tenure": float(blank[zero].mean()) if zero.any() else 0.0,
+            "p_blank": float(blank[~zero].mean()) if (~zero).any() else 0.0,
+            "ratio": _Pool(ratio if len(ratio) else np.ones(1), np.zeros(max(len(ratio), 1), dtype=int), 1),
+        }
+
+    def sample(self, n: int, rng: np.random.Generator, start: int = 0) -> pd.DataFrame:
+        """``n`` rows in the source's column order; ``start`` numbers the customer IDs."""
+        churn = (rng.random(n) < self.churn_rate).astype(int)
+        codes: Dict[str, np.ndarray] = {}
+        out: Dict[str, np.ndarray] = {}
+        for col in self.order:
+            parent = self.parent[col]
+            n_parent = len(self.discrete[parent]) if parent else 1
+            cell = churn * n_parent + (codes[parent] if parent else 0)
+            codes[col] = _draw(self._cdf[col][cell], rng)
+            out[col] = self.discrete[col][codes[col]]
+
+        numeric: Dict[str, np.ndarray] = {}
+        for col, spec in self.continuous.items():
+            parent = spec["parent"]
+            n_parent = len(self.discrete[parent]) if parent else 1
+            cell = churn * n_parent + (codes[parent] if parent else 0)
+            values = spec["pool"].sample(cell, rng, spec["fallback"], churn)
+            if not spec["integer"]:
+                values = np.round(values * (1.0 + JITTER * rng.standard_normal(n)), spec["decimals"])
+            numeric[col] = values
+            out[col] = values.astype(np.int64) if spec["integer"] else values
+
+        if self.total_charges is not None:
+            tc = self.total_charges
+            tenure, monthly = numeric["tenure"], numeric["MonthlyCharges"]
+            ratio = tc["ratio"].sample(np.zeros(n, dtype=int), rng)
+            total = np.round(np.maximum(tenure, 1) * monthly * ratio, 2).astype(object)
+            p_blank = np.where(tenure == 0, tc["p_blank_zero_tenure"], tc["p_blank"])
+            total[rng.random(n) < p_blank] = tc["blank_token"]
+            out["TotalCharges"] = total
+
+        if self.id_column:
+            out[self.id_column] = _customer_ids(start, n)
+        out["Churn"] = self.churn_levels[churn]
+        return pd.DataFrame(out, columns=self.columns)
+
+    def write_csv(self, path: str, rows: int, seed: int = 0, chunk_size: int = 200_000) -> None:
+        """Stream ``rows`` rows to ``path``; chunk ``i`` is drawn from ``default_rng([seed, i])``."""
+        tmp = f"{path}.tmp-{os.getpid()}"
+        with open(tmp, "w", newline="") as f:
+            for i, start in enumerate(range(0, rows, chunk_size)):
+                chunk = self.sample(min(chunk_size, rows - start), np.random.default_rng([seed, i]), start=start)
+                chunk.to_csv(f, header=i == 0, index=False)
+        os.replace(tmp, path)
+
+
+def _customer_ids(start: int, n: int) -> np.ndarray:
+    """Unique IDs in the source's ``1234-ABCDE`` shape, numbered from ``start``."""
+    idx = np.arange(start, start + n, dtype=np.int64)
+    letters = np.empty((n, 5), dtype="<U1")
+    rest = idx % 26 ** 5
+    for pos in range(4, -1, -1):
+        letters[:, pos] = ID_LETTERS[rest % 26]
+        rest //= 26
+    digits = np.char.zfill(((idx // 26 ** 5) % 10_000).astype(str), 4)
+    return np.char.add(np.char.add(digits, "-"), np.array(["".join(r) for r in letters]))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Write a synthetic Telco-schema CSV learned from a source CSV.")
+    parser.add_argument("--source", default=None, help="Source CSV (default: the usual dataset locations).")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=200_000)
+    ns = parser.parse_args()
+
+    from src.train import find_data_file
+
+    source = find_data_file(ns.source)
+    t0 = time.perf_counter()
+    synth = TelcoSynthesizer.fit(source)
+    tree = ", ".join(f"{c}<-{synth.parent[c]}" for c in synth.order[1:])
+    print(f"Learned from {source} in {time.perf_counter() - t0:.2f}s; root {synth.order[0]}; {tree}")
+    t0 = time.perf_counter()
+    synth.write_csv(ns.out, ns.rows, seed=ns.seed, chunk_size=ns.chunk_size)
+    seconds = time.perf_counter() - t0
+    print(f"Wrote {ns.rows:,} rows to {ns.out} ({os.path.getsize(ns.out) / 1e6:.1f} MB) in {seconds:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
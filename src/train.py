@@ -3,17 +3,25 @@ import sys
 import argparse
 import warnings
 import pickle
-from typing import List, Optional
+import multiprocessing
+import subprocess
+import tempfile
+import json
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
 from sklearn.exceptions import ConvergenceWarning
-from sklearn.model_selection import train_test_split
+from sklearn.base import clone
+from sklearn.model_selection import ParameterGrid, StratifiedKFold, train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, OrdinalEncoder, StandardScaler
 from sklearn.feature_selection import SelectKBest, f_classif
 from sklearn.metrics import (
     accuracy_score,
@@ -23,9 +31,18 @@ from sklearn.metrics import (
     roc_auc_score,
     roc_curve,
 )
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier, RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
 import matplotlib.pyplot as plt
+from threadpoolctl import threadpool_limits
+
+from src.artifact import remove_artifact, save_artifact
+from src.compiled import UnsupportedPipelineError
+from src.incremental import fit_streaming_pipeline
+from src.ingest import CSV_ENGINES, as_object, iter_telco_chunks, load_telco
+from src.model_store import load_model
+from src.profiling import StageProfiler
+from src.scoring import score_records
 
 
 warnings.filterwarnings("ignore", category=ConvergenceWarning)
@@ -36,14 +53,14 @@ def ensure_dirs(paths: List[str]) -> None:
         os.makedirs(p, exist_ok=True)
 
 
-def resolve_ohe() -> OneHotEncoder:
+def resolve_ohe(sparse: bool = False) -> OneHotEncoder:
     """Create a OneHotEncoder compatible with multiple scikit-learn versions."""
     try:
         # scikit-learn >= 1.2
-        return OneHotEncoder(handle_unknown="ignore", sparse_output=False)
+        return OneHotEncoder(handle_unknown="ignore", sparse_output=sparse)
     except TypeError:
         # scikit-learn < 1.2
-        return OneHotEncoder(handle_unknown="ignore", sparse=False)
+        return OneHotEncoder(handle_unknown="ignore", sparse=sparse)
 
 
 def find_data_file(user_path: Optional[str] = None) -> str:
@@ -75,43 +92,31 @@ def find_data_file(user_path: Optional[str] = None) -> str:
     )
 
 
-def load_and_clean_data(csv_path: str) -> pd.DataFrame:
-    df = pd.read_csv(csv_path)
-
-    # Standard fixes for Telco dataset
-    if "TotalCharges" in df.columns:
-        df["TotalCharges"] = (
-            df["TotalCharges"].replace(" ", np.nan).apply(pd.to_numeric, errors="coerce")
-        )
-
-    # Drop ID column if present
-    for id_col in ["customerID", "CustomerID", "customer_id"]:
-        if id_col in df.columns:
-            df = df.drop(columns=[id_col])
-            break
-
-    # Ensure Churn exists and is numeric 0/1
-    if "Churn" not in df.columns:
-        raise ValueError("No 'Churn' column found in dataset.")
+def load_and_clean_data(csv_path: str, engine: str = "c", cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """Typed load of the Telco CSV (see ``src.ingest``), cached as Parquet when ``cache_dir`` is set."""
+    return load_telco(csv_path, engine=engine, cache_dir=cache_dir)
 
-    if df["Churn"].dtype == object:
-        # Common mapping Yes/No -> 1/0
-        df["Churn"] = df["Churn"].map({"Yes": 1, "No": 0})
 
-    # If still non-numeric, try to coerce
-    if not np.issubdtype(df["Churn"].dtype, np.number):
-        df["Churn"] = pd.to_numeric(df["Churn"], errors="coerce")
+# Estimated preprocessed width from which the one-hot block stays sparse through
+# selection and fitting. At Telco's own ~45 columns both layouts are tens of MB,
+# but RandomForest fits ~5x slower on CSR; at ~2,000 columns the dense matrix
+# peaks at GBs where CSR needs ~50 MB (benchmarks/bench_sparse.py)
+SPARSE_MIN_WIDTH = 200
 
-    # Final sanity drop NA rows in target
-    df = df.dropna(subset=["Churn"])  # just in case
-    df["Churn"] = df["Churn"].astype(int)
 
-    return df
+def estimate_output_width(X: pd.DataFrame) -> int:
+    """Columns the preprocessor will produce: one per numeric column plus one per category level."""
+    numeric_cols = X.select_dtypes(include=["number"]).columns
+    categorical_cols = X.select_dtypes(include=["object", "category", "bool"]).columns
+    return len(numeric_cols) + sum(int(X[c].nunique()) for c in categorical_cols)
 
 
-def build_preprocessor(X: pd.DataFrame) -> ColumnTransformer:
-    numeric_cols = X.select_dtypes(include=["int64", "float64", "int32", "float32"]).columns.tolist()
+def build_preprocessor(X: pd.DataFrame, sparse: Optional[bool] = None) -> ColumnTransformer:
+    # "number" also covers the downcast int8/int16 columns from src.ingest
+    numeric_cols = X.select_dtypes(include=["number"]).columns.tolist()
     categorical_cols = X.select_dtypes(include=["object", "category", "bool"]).columns.tolist()
+    if sparse is None:
+        sparse = estimate_output_width(X) >= SPARSE_MIN_WIDTH
 
     numeric_transformer = Pipeline(steps=[
         ("imputer", SimpleImputer(strategy="median")),
@@ -120,29 +125,71 @@ def build_preprocessor(X: pd.DataFrame) -> ColumnTransformer:
 
     categorical_transformer = Pipeline(steps=[
         ("imputer", SimpleImputer(strategy="most_frequent")),
-        ("onehot", resolve_ohe()),
+        ("onehot", resolve_ohe(sparse=sparse)),
     ])
 
     preprocessor = ColumnTransformer(
         transformers=[
             ("num", numeric_transformer, numeric_cols),
             ("cat", categorical_transformer, categorical_cols),
-        ]
+        ],
+        # Keep the stacked output CSR whenever the one-hot block is sparse
+        sparse_threshold=1.0 if sparse else 0.3,
     )
 
     return preprocessor
 
 
-def train_and_eval_models(X_train_sel, X_test_sel, y_train, y_test):
-    models = [
-        (LogisticRegression(max_iter=1000, random_state=42), "LogisticRegression"),
-        (RandomForestClassifier(n_estimators=200, random_state=42), "RandomForest"),
-        (GradientBoostingClassifier(n_estimators=200, random_state=42), "GradientBoosting"),
-    ]
+def build_native_preprocessor(X: pd.DataFrame) -> ColumnTransformer:
+    """Numeric columns as they are (NaN included) and categoricals as ordinal codes.
 
-    results = []
-    for mdl, name in models:
-        print(f"\nTraining {name} ...")
+    For estimators that split on categories natively: no one-hot expansion, no
+    scaling, and missing or unseen categories become NaN, which they route on.
+    """
+    numeric_cols = X.select_dtypes(include=["number"]).columns.tolist()
+    categorical_cols = X.select_dtypes(include=["object", "category", "bool"]).columns.tolist()
+    encoder = Pipeline(steps=[
+        # An all-missing column arrives as float; the encoder needs it typed like the training strings
+        ("as_object", FunctionTransformer(as_object)),
+        ("ordinal", OrdinalEncoder(
+            handle_unknown="use_encoded_value", unknown_value=np.nan, encoded_missing_value=np.nan,
+        )),
+    ])
+    return ColumnTransformer(transformers=[
+        ("num", "passthrough", numeric_cols),
+        ("cat", encoder, categorical_cols),
+    ])
+
+
+def native_hgb_pipeline(X: pd.DataFrame) -> Pipeline:
+    """HistGradientBoosting on ordinal-coded categoricals, early-stopped on a validation split."""
+    preprocessor = build_native_preprocessor(X)
+    n_numeric = len(preprocessor.transformers[0][2])
+    # Native categorical splits take at most max_bins (255) levels; wider columns are split as ordinals
+    categorical = [False] * n_numeric + [int(X[c].nunique()) < 255 for c in preprocessor.transformers[1][2]]
+    estimator = HistGradientBoostingClassifier(
+        max_iter=500,
+        early_stopping=True,
+        validation_fraction=0.1,
+        n_iter_no_change=20,
+        categorical_features=categorical,
+        random_state=42,
+    )
+    return Pipeline(steps=[("preprocessor", preprocessor), ("estimator", estimator)])
+
+
+def uses_raw_features(mdl) -> bool:
+    """Candidates that are whole pipelines bring their own preprocessing and take the raw frame."""
+    return isinstance(mdl, Pipeline)
+
+
+def _fit_and_score(mdl, name, X_train_sel, X_test_sel, y_train, y_test, n_threads: int = 1):
+    """Fit one candidate and compute its test metrics; runs in a pool worker when jobs > 1."""
+    # Wall-clock (not perf_counter) span, so spans from different pool workers line up
+    started = time.time()
+    t0 = time.perf_counter()
+    # Keep BLAS/OpenMP inside this candidate's share of the CPU budget
+    with threadpool_limits(limits=n_threads):
         mdl.fit(X_train_sel, y_train)
         preds = mdl.predict(X_test_sel)
         if hasattr(mdl, "predict_proba"):
@@ -157,87 +204,502 @@ def train_and_eval_models(X_train_sel, X_test_sel, y_train, y_test):
                 # worst-case fallback
                 probs = preds.astype(float)
 
-        acc = accuracy_score(y_test, preds)
-        prec = precision_score(y_test, preds, zero_division=0)
-        rec = recall_score(y_test, preds, zero_division=0)
-        f1 = f1_score(y_test, preds, zero_division=0)
-        roc = roc_auc_score(y_test, probs)
-        res = {"model": name, "acc": acc, "prec": prec, "rec": rec, "f1": f1, "roc_auc": roc, "estimator": mdl}
+    return {
+        "model": name, **classification_metrics(y_test, preds, probs), "estimator": mdl,
+        "fit_seconds": time.perf_counter() - t0, "fit_span": (started, time.time()),
+    }
+
+
+def classification_metrics(y_true, preds, probs):
+    return {
+        "acc": accuracy_score(y_true, preds),
+        "prec": precision_score(y_true, preds, zero_division=0),
+        "rec": recall_score(y_true, preds, zero_division=0),
+        "f1": f1_score(y_true, preds, zero_division=0),
+        "roc_auc": roc_auc_score(y_true, probs),
+    }
+
+
+METRIC_KEYS = ("acc", "prec", "rec", "f1", "roc_auc")
+REPORT_COLUMNS = ("accuracy", "precision", "recall", "f1", "roc_auc")
+# Cost columns of the report, where measured (see serving_profile)
+SERVING_COLUMNS = (
+    "fit_seconds", "latency_ms", "batch_latency_ms", "batch_rows", "model_mb", "load_ms", "within_budget",
+)
+# Measured on the holdout refit in CV/search runs, whose other metrics are fold means
+REFIT_COLUMNS = ("latency_ms", "batch_latency_ms", "batch_rows", "model_mb", "load_ms")
+
+
+def serving_report_columns(r) -> dict:
+    """A result's serving columns for the report, prefixed ``refit_`` where they describe the refit."""
+    prefix = "refit_" if "cv_folds" in r else ""
+    out = {(prefix + key if key in REFIT_COLUMNS else key): r[key] for key in SERVING_COLUMNS if key in r}
+    if "refit_roc_auc" in r:
+        out["refit_roc_auc"] = r["refit_roc_auc"]
+    return out
+
+# Estimators whose ``n_jobs`` parallelises a binary fit (with threads). LogisticRegression
+# also takes n_jobs, but only uses it for multiclass one-vs-rest.
+THREADED_ESTIMATORS = (RandomForestClassifier,)
+# Parallel through OpenMP, which the threadpool limit in _fit_and_score caps
+OPENMP_ESTIMATORS = (HistGradientBoostingClassifier,)
+
+
+def split_cpu_budget(models, jobs: int) -> Tuple[int, List[int]]:
+    """Split ``jobs`` cores into (pool workers, threads per candidate).
+
+    Each candidate gets its own worker. Candidates that can't parallelise
+    internally hold one core each; the remaining cores are shared between
+    the ``THREADED_ESTIMATORS`` and ``OPENMP_ESTIMATORS``.
+    """
+    workers = max(1, min(jobs, len(models)))
+    parallel = [
+        i for i, (mdl, _) in enumerate(models)
+        if isinstance(mdl.steps[-1][1] if uses_raw_features(mdl) else mdl, THREADED_ESTIMATORS + OPENMP_ESTIMATORS)
+    ]
+    threads = [1] * len(models)
+    if parallel:
+        spare = max(jobs - (workers - len(parallel)), len(parallel))
+        for n, i in enumerate(parallel):
+            threads[i] = spare // len(parallel) + (1 if n < spare % len(parallel) else 0)
+    return workers, threads
+
+
+def candidate_models(X: Optional[pd.DataFrame] = None):
+    """Candidates fitted on the selected matrix, plus the native-categorical pipeline when the raw ``X`` is given."""
+    models = [
+        (LogisticRegression(max_iter=1000, random_state=42), "LogisticRegression"),
+        (RandomForestClassifier(n_estimators=200, random_state=42), "RandomForest"),
+        (GradientBoostingClassifier(n_estimators=200, random_state=42), "GradientBoosting"),
+    ]
+    if X is not None:
+        models.append((native_hgb_pipeline(X), "HistGradientBoosting"))
+    return models
+
+
+def _run_fits(tasks, workers: int):
+    """Yield ``_fit_and_score`` results in task order, from a process pool when ``workers`` > 1."""
+    if workers <= 1:
+        for t in tasks:
+            yield _fit_and_score(*t)
+        return
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = [pool.submit(_fit_and_score, *t) for t in tasks]
+        # Collect in submission order whatever order the workers finish in
+        for fut in futures:
+            yield fut.result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def _format_metrics(res) -> str:
+    if "roc_auc_std" in res:
+        return ", ".join(f"{m}: {res[m]:.4f}±{res[m + '_std']:.4f}" for m in METRIC_KEYS)
+    return ", ".join(f"{m}: {res[m]:.4f}" for m in METRIC_KEYS)
+
+
+def train_and_eval_models(
+    X_train_sel, X_test_sel, y_train, y_test, jobs: int = 1,
+    X_train: Optional[pd.DataFrame] = None, X_test: Optional[pd.DataFrame] = None,
+):
+    """Fit every candidate on the training split and score it on the test split.
+
+    Pass the raw ``X_train``/``X_test`` frames to include the native-categorical
+    candidate, which does its own preprocessing.
+    """
+    models = candidate_models(X_train)
+    workers, threads = split_cpu_budget(models, jobs)
+    for (mdl, _), n in zip(models, threads):
+        if isinstance(mdl, THREADED_ESTIMATORS):
+            mdl.set_params(n_jobs=n)
+    tasks = [
+        (mdl, name, *((X_train, X_test) if uses_raw_features(mdl) else (X_train_sel, X_test_sel)), y_train, y_test, n)
+        for (mdl, name), n in zip(models, threads)
+    ]
+    if workers > 1:
+        print(f"\nTraining {len(models)} candidates in {workers} processes, threads per candidate: {threads}")
+
+    results = []
+    fits = _run_fits(tasks, workers)
+    for _, name in models:
+        print(f"\nTraining {name} ...")
+        res = next(fits)
         results.append(res)
-        print(f"{name} - acc: {acc:.4f}, prec: {prec:.4f}, rec: {rec:.4f}, f1: {f1:.4f}, roc_auc: {roc:.4f}")
+        print(f"{name} - {_format_metrics(res)}")
 
     best = max(results, key=lambda r: r["roc_auc"])
     print("\nBest model by ROC AUC:", best["model"], "ROC AUC:", f"{best['roc_auc']:.4f}")
     return results, best
 
 
-def main(args: Optional[List[str]] = None) -> int:
-    parser = argparse.ArgumentParser(description="Train churn prediction models and persist best pipeline.")
-    parser.add_argument("--data-path", type=str, default=None, help="Path to Telco CSV file.")
-    parser.add_argument("--test-size", type=float, default=0.2, help="Test size split fraction.")
-    parser.add_argument("--random-state", type=int, default=42, help="Random seed for reproducibility.")
-    ns = parser.parse_args(args=args)
+def fit_feature_steps(
+    X_fit: pd.DataFrame, y_fit, *X_others: pd.DataFrame,
+    sparse: Optional[bool] = None, profiler: Optional[StageProfiler] = None,
+):
+    """Fit the preprocessor and SelectKBest on ``X_fit``; return them with the selected matrices.
 
-    # Prepare output dirs
-    models_dir = os.path.join("models")
-    reports_dir = os.path.join("reports")
-    figures_dir = os.path.join(reports_dir, "figures")
-    ensure_dirs([models_dir, reports_dir, figures_dir])
+    The matrices are CSR when the preprocessor is sparse (see ``build_preprocessor``);
+    SelectKBest and every candidate estimator accept that as is.
+    """
+    profiler = profiler or StageProfiler(enabled=False)
+    with profiler.stage("fit_transform") as details:
+        preprocessor = build_preprocessor(X_fit, sparse=sparse)
+        X_fit_p = preprocessor.fit_transform(X_fit)
+        details["shape"] = list(X_fit_p.shape)
+    with profiler.stage("select_kbest"):
+        selector = SelectKBest(score_func=f_classif, k=min(20, X_fit_p.shape[1]))
+        selector.fit(X_fit_p, y_fit)
+        X_fit_sel = selector.transform(X_fit_p)
+    with profiler.stage("transform_holdout"):
+        others = [selector.transform(preprocessor.transform(X)) for X in X_others]
+    return preprocessor, selector, X_fit_sel, others
+
+
+def prepare_folds(X: pd.DataFrame, y: pd.Series, folds: int, random_state: int = 42):
+    """Fit preprocessing + selection once per stratified fold.
+
+    Returns ``[(X_fit_sel, X_val_sel, y_fit, y_val, X_fit, X_val)]``; the raw
+    frames are for candidates that bring their own preprocessing.
+    """
+    skf = StratifiedKFold(n_splits=folds, shuffle=True, random_state=random_state)
+    print(f"\nPreparing {folds} stratified folds ...")
+    fold_data = []
+    for fit_idx, val_idx in skf.split(X, y):
+        X_fit, X_val = X.iloc[fit_idx], X.iloc[val_idx]
+        _, _, X_fit_sel, (X_val_sel,) = fit_feature_steps(X_fit, y.iloc[fit_idx], X_val)
+        fold_data.append((X_fit_sel, X_val_sel, y.iloc[fit_idx].to_numpy(), y.iloc[val_idx].to_numpy(), X_fit, X_val))
+    return fold_data
+
+
+def _fold_fit(mdl, name: str, fold, rows=None):
+    """``(estimator, name, X_fit, X_val, y_fit, y_val)`` for one cached fold, restricted to training ``rows``."""
+    X_fit_sel, X_val_sel, y_fit, y_val, X_fit, X_val = fold
+    if uses_raw_features(mdl):
+        X_fit = X_fit if rows is None else X_fit.iloc[rows]
+    else:
+        X_fit, X_val = (X_fit_sel if rows is None else X_fit_sel[rows]), X_val_sel
+    return mdl, name, X_fit, X_val, (y_fit if rows is None else y_fit[rows]), y_val
+
+
+def _budgeted_tasks(fits, jobs: int):
+    """Turn ``[(estimator, name, X_fit, X_val, y_fit, y_val)]`` into pool tasks sharing ``jobs`` cores."""
+    workers, threads = split_cpu_budget([(f[0], f[1]) for f in fits], jobs)
+    tasks = []
+    for fit, n in zip(fits, threads):
+        if isinstance(fit[0], THREADED_ESTIMATORS):
+            fit[0].set_params(n_jobs=n)
+        tasks.append((*fit, n))
+    return tasks, workers
+
+
+def _aggregate_folds(name: str, fold_results, folds: int, estimator) -> dict:
+    res = {"model": name, "cv_folds": folds, "estimator": estimator}
+    for m in METRIC_KEYS:
+        values = np.array([r[m] for r in fold_results])
+        res[m], res[f"{m}_std"] = float(values.mean()), float(values.std())
+    res["fit_seconds"] = float(sum(r["fit_seconds"] for r in fold_results))
+    # First fold start to last fold end: the elapsed time with folds running in parallel
+    res["wall_seconds"] = max(r["fit_span"][1] for r in fold_results) - min(r["fit_span"][0] for r in fold_results)
+    res["fold_fit_seconds"] = res["fit_seconds"] / len(fold_results)
+    return res
+
+
+def cross_validate_models(X: pd.DataFrame, y: pd.Series, folds: int, jobs: int = 1, random_state: int = 42):
+    """Stratified K-fold evaluation of every candidate, in parallel over (candidate, fold).
+
+    Preprocessing and feature selection are fitted once per fold and shared by
+    all candidates. Results carry mean metrics plus ``<metric>_std``; the best
+    candidate is picked on mean ROC AUC and returned unfitted.
+    """
+    fold_data = prepare_folds(X, y, folds, random_state)
+    models = candidate_models(X)
+    fits = [_fold_fit(clone(mdl), name, data) for mdl, name in models for data in fold_data]
+    tasks, workers = _budgeted_tasks(fits, jobs)
+    print(f"Cross-validating {len(models)} candidates x {folds} folds in {workers} process(es) ...")
 
-    # Locate and load data
-    csv_path = find_data_file(ns.data_path)
-    print(f"Dataset: {csv_path}")
-    df = load_and_clean_data(csv_path)
-    print("Dataset loaded. Shape:", df.shape)
+    results = []
+    fits = _run_fits(tasks, workers)
+    for mdl, name in models:
+        res = _aggregate_folds(name, [next(fits) for _ in fold_data], folds, mdl)
+        results.append(res)
+        print(f"{name} - {_format_metrics(res)}")
 
-    # Split
-    if "Churn" not in df.columns:
-        raise ValueError("Dataset must contain 'Churn' column after loading.")
+    best = max(results, key=lambda r: r["roc_auc"])
+    print("\nBest model by mean CV ROC AUC:", best["model"], "ROC AUC:", f"{best['roc_auc']:.4f}")
+    return results, best
 
-    X = df.drop(columns=["Churn"])
-    y = df["Churn"].astype(int)
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=ns.test_size, stratify=y, random_state=ns.random_state
-    )
-    print(f"Train shape: {X_train.shape}, Test shape: {X_test.shape}")
+# Per-family grids for --search; fixed settings live on the base estimators in candidate_models()
+SEARCH_SPACES = {
+    "LogisticRegression": ParameterGrid({"C": [0.01, 0.1, 1.0, 10.0], "class_weight": [None, "balanced"]}),
+    "RandomForest": ParameterGrid({
+        "n_estimators": [100, 200, 400], "max_depth": [None, 8, 16], "min_samples_leaf": [1, 5],
+    }),
+    "GradientBoosting": ParameterGrid({
+        "n_estimators": [100, 200, 400], "learning_rate": [0.05, 0.1], "max_depth": [2, 3],
+    }),
+    # A pipeline candidate: its estimator's parameters carry the step prefix
+    "HistGradientBoosting": ParameterGrid({
+        "estimator__learning_rate": [0.05, 0.1], "estimator__max_leaf_nodes": [15, 31, 63],
+        "estimator__l2_regularization": [0.0, 1.0],
+    }),
+}
+
+
+def search_models(
+    X: pd.DataFrame, y: pd.Series, folds: int = 3, jobs: int = 1, random_state: int = 42,
+    eta: int = 3, min_rows: int = 200,
+):
+    """Successive-halving search over ``SEARCH_SPACES``, all families in parallel.
+
+    Round r fits every surviving configuration on the first ``n / eta**(R - r)``
+    training rows of each cached fold (a fixed random order, so budgets nest)
+    and keeps the best ``1/eta`` by mean ROC AUC; the last round uses every row.
+    Returns ``(results, best, leaderboard)``: one result per family (its
+    winning configuration, evaluated at full budget), the overall best, and a
+    row per configuration with the round it reached and, for that round, the
+    wall-clock time of its cross-validation and the mean fit time per fold.
+    """
+    fold_data = prepare_folds(X, y, folds, random_state)
+    rng = np.random.default_rng(random_state)
+    orders = [rng.permutation(len(data[2])) for data in fold_data]
+    n_rows = min(len(o) for o in orders)
+
+    base = {name: mdl for mdl, name in candidate_models(X)}
+    configs = {name: list(SEARCH_SPACES[name]) for name in base}
+    rounds = max(math.ceil(math.log(len(c), eta)) for c in configs.values())
+    # Don't let the first round go below min_rows (or the folds' size)
+    rounds = min(rounds, max(0, int(math.log(max(n_rows / min_rows, 1), eta))))
+
+    board = {(name, i): {"model": name, "params": json.dumps(p, sort_keys=True), "round": 0, "rows": 0,
+                         "roc_auc": float("nan"), "roc_auc_std": float("nan"),
+                         "wall_seconds": float("nan"), "fold_fit_seconds": float("nan")}
+             for name, cfgs in configs.items() for i, p in enumerate(cfgs)}
+    survivors = {name: list(range(len(cfgs))) for name, cfgs in configs.items()}
+    scores = {}
+    for r in range(rounds + 1):
+        rows = n_rows if r == rounds else max(min_rows, n_rows // eta ** (rounds - r))
+        keys = [(name, i) for name in survivors for i in survivors[name]]
+        fits = []
+        for name, i in keys:
+            for data, order in zip(fold_data, orders):
+                est = clone(base[name]).set_params(**configs[name][i])
+                fits.append(_fold_fit(est, name, data, order[:rows]))
+        tasks, workers = _budgeted_tasks(fits, jobs)
+        print(f"Search round {r + 1}/{rounds + 1}: {len(keys)} configurations x {folds} folds on {rows} rows "
+              f"({workers} process(es)) ...")
+
+        results_iter = _run_fits(tasks, workers)
+        for key in keys:
+            res = _aggregate_folds(key[0], [next(results_iter) for _ in fold_data], folds, None)
+            scores[key] = res
+            entry = board[key]
+            entry.update(
+                round=r + 1, rows=rows, roc_auc=res["roc_auc"], roc_auc_std=res["roc_auc_std"],
+                wall_seconds=res["wall_seconds"], fold_fit_seconds=res["fold_fit_seconds"],
+            )
+
+        if r < rounds:
+            for name, idx in survivors.items():
+                keep = max(1, math.ceil(len(idx) / eta))
+                # Stable on ties: earlier grid points win
+                survivors[name] = sorted(idx, key=lambda i: -scores[(name, i)]["roc_auc"])[:keep]
 
-    # Build preprocessing
-    preprocessor = build_preprocessor(X)
+    results = []
+    for name, idx in survivors.items():
+        i = max(idx, key=lambda i: scores[(name, i)]["roc_auc"])
+        res = dict(scores[(name, i)])
+        res["estimator"] = clone(base[name]).set_params(**configs[name][i])
+        res["params"] = board[(name, i)]["params"]
+        results.append(res)
+        print(f"{name} {res['params']} - {_format_metrics(res)}")
 
-    # Fit and transform train/test
-    print("Fitting preprocessor and transforming data ...")
-    X_train_p = preprocessor.fit_transform(X_train)
-    X_test_p = preprocessor.transform(X_test)
-
-    # Feature selection
-    k = min(20, X_train_p.shape[1])
-    selector = SelectKBest(score_func=f_classif, k=k)
-    selector.fit(X_train_p, y_train)
-    X_train_sel = selector.transform(X_train_p)
-    X_test_sel = selector.transform(X_test_p)
-    print("Feature selection complete. Selected features:", X_train_sel.shape[1])
+    leaderboard = sorted(board.values(), key=lambda e: (-e["round"], -np.nan_to_num(e["roc_auc"], nan=-1.0)))
+    for rank, entry in enumerate(leaderboard, 1):
+        entry["rank"] = rank
+    best = max(results, key=lambda r: r["roc_auc"])
+    print("\nBest model by mean CV ROC AUC:", best["model"], best["params"], "ROC AUC:", f"{best['roc_auc']:.4f}")
+    return results, best, leaderboard
 
-    # Train and evaluate candidate models
-    results, best = train_and_eval_models(X_train_sel, X_test_sel, y_train, y_test)
 
-    # Build final pipeline and fit on train set
-    final_pipeline = Pipeline(steps=[
+def assemble_fitted_pipeline(preprocessor, selector, estimator, X_check: pd.DataFrame, X_check_sel) -> Pipeline:
+    """Chain already-fitted steps into the served Pipeline and check it end to end.
+
+    The pipeline run on raw ``X_check`` must reproduce the estimator's
+    probabilities on the matrix it was evaluated on (``X_check_sel``) exactly.
+    """
+    pipeline = Pipeline(steps=[
         ("preprocessor", preprocessor),
         ("selector", selector),
-        ("estimator", best["estimator"]),
+        ("estimator", estimator),
     ])
+    expected = estimator.predict_proba(X_check_sel)
+    got = pipeline.predict_proba(X_check)
+    if not np.array_equal(expected, got):
+        raise RuntimeError(
+            f"Assembled pipeline disagrees with the evaluated estimator (max abs diff {np.max(np.abs(expected - got)):.3g})"
+        )
+    print(f"Verified assembled pipeline: identical probabilities on {len(X_check)} held-out rows.")
+    return pipeline
+
+
+def _median_ms(fn, repeats: int) -> float:
+    fn()  # warm-up
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times)) * 1000
+
+
+def serving_profile(pipeline, X_sample: pd.DataFrame, repeats: int = 50, batch_rows: int = 1000) -> dict:
+    """What serving ``pipeline`` costs, measured on the file and scorer the API would use.
+
+    The pipeline is written as ``save_outputs`` would publish it (the artifact
+    directory when it can be represented, else the pickle) and loaded with the
+    API's ``load_model``, so the compiled or memory-mapped scorer is timed.
+    ``latency_ms`` is the median time to score one customer dict (the API's
+    ``/predict``), ``batch_latency_ms`` the same for ``batch_rows`` dicts;
+    ``model_mb`` is the size on disk and ``load_ms`` the median ``load_model`` time.
+    """
+    records = X_sample.iloc[:batch_rows].to_dict("records")
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            path = save_artifact(pipeline, os.path.join(tmp, "artifact"))
+            files = [os.path.join(os.path.dirname(path), name) for name in os.listdir(os.path.dirname(path))]
+        except (UnsupportedPipelineError, ValueError):
+            path = os.path.join(tmp, "model.pkl")
+            with open(path, "wb") as f:
+                pickle.dump(pipeline, f)
+            files = [path]
+        scorer = load_model(path).scorer
+        profile = {
+            "latency_ms": _median_ms(lambda: score_records(scorer, records[:1]), repeats),
+            "batch_latency_ms": _median_ms(lambda: score_records(scorer, records), max(3, repeats // 10)),
+            "batch_rows": len(records),
+            "model_mb": sum(os.path.getsize(f) for f in files) / (1024 * 1024),
+            "load_ms": _median_ms(lambda: load_model(path), 3),
+        }
+        # Drop the memory maps before the directory goes away
+        del scorer
+    return profile
+
+
+def within_budget(res, max_latency_ms: Optional[float] = None, max_model_mb: Optional[float] = None) -> bool:
+    """Whether a profiled result fits the serving budget; unset limits always pass."""
+    return (
+        (max_latency_ms is None or res["latency_ms"] <= max_latency_ms)
+        and (max_model_mb is None or res["model_mb"] <= max_model_mb)
+    )
+
+
+def served_pipeline(preprocessor, selector, estimator) -> Pipeline:
+    """The pipeline a candidate would be served as, for timing it on raw rows."""
+    if uses_raw_features(estimator):
+        return estimator
+    return Pipeline(steps=[("preprocessor", preprocessor), ("selector", selector), ("estimator", estimator)])
+
 
-    print("\nFitting final pipeline on training data ...")
-    final_pipeline.fit(X_train, y_train)
+def _without_training_threads(estimator) -> None:
+    # Training parallelism shouldn't follow the model into serving
+    if isinstance(estimator, THREADED_ESTIMATORS):
+        estimator.set_params(n_jobs=None)
 
+
+def print_speed_table(results) -> None:
+    if any("cv_folds" in r for r in results):
+        print("\nroc_auc is the cross-validated mean; serving columns are measured on the holdout refit.")
+    print(f"\n{'model':<24}{'roc_auc':>9}{'fit_s':>9}{'latency_ms':>12}{'batch_ms':>10}{'model_mb':>10}{'load_ms':>9}")
+    for r in results:
+        serving = (
+            f"{r['latency_ms']:>12.2f}{r['batch_latency_ms']:>10.1f}{r['model_mb']:>10.2f}{r['load_ms']:>9.1f}"
+            if "latency_ms" in r else f"{'-':>12}{'-':>10}{'-':>10}{'-':>9}"
+        )
+        budget = "" if "within_budget" not in r else "" if r["within_budget"] else "  over budget"
+        print(f"{r['model']:<24}{r['roc_auc']:>9.4f}{r['fit_seconds']:>9.2f}{serving}{budget}")
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in a fresh interpreter: unpickle the model and score the check rows, if any.
+# Names live inside the function so nothing in __main__ can satisfy a bad reference.
+_RELOAD_CHECK = """
+def _check(argv):
+    import pickle
+    import numpy as np
+    import pandas as pd
+    with open(argv[1], "rb") as fh:
+        model = pickle.load(fh)
+    if len(argv) > 2:
+        np.save(argv[3], model.predict_proba(pd.read_pickle(argv[2])))
+import sys
+_check(sys.argv)
+"""
+
+
+def check_pickle_reloads(path: str, pipeline, X_check: Optional[pd.DataFrame] = None) -> None:
+    """Load ``path`` in a new interpreter, as the API does, and compare its probabilities on ``X_check``.
+
+    Catches pickles that only load inside the training process, e.g. ones
+    referring to functions defined in ``__main__``. Raises ``RuntimeError``.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        cmd = [sys.executable, "-c", _RELOAD_CHECK, os.path.abspath(path)]
+        if X_check is not None:
+            X_check.to_pickle(os.path.join(tmp, "X.pkl"))
+            cmd += [os.path.join(tmp, "X.pkl"), os.path.join(tmp, "proba.npy")]
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [PROJECT_ROOT, os.environ.get("PYTHONPATH")]))}
+        out = subprocess.run(cmd, cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+        if out.returncode != 0:
+            raise RuntimeError(f"Saved model doesn't load in a fresh interpreter:\n{out.stderr.strip()}")
+        if X_check is not None:
+            got = np.load(os.path.join(tmp, "proba.npy"))
+            if not np.allclose(got, pipeline.predict_proba(X_check), rtol=0, atol=1e-12):
+                raise RuntimeError("Reloaded model disagrees with the trained pipeline")
+
+
+def save_outputs(
+    final_pipeline: Pipeline, results, best_name: str, y_test, y_proba,
+    models_dir: str, reports_dir: str, leaderboard=None, profiler: Optional[StageProfiler] = None,
+    X_check: Optional[pd.DataFrame] = None,
+) -> None:
+    """Write the model pickle and artifact, the evaluation report(s), the ROC figure and the profile.
+
+    The pickle replaces the served one only after it reloads (and reproduces
+    the pipeline on ``X_check``) in a fresh interpreter.
+    """
+    profiler = profiler or StageProfiler(enabled=False)
     # Persist model and reports
     model_path = os.path.join(models_dir, "best_model_pipeline.pkl")
     report_path = os.path.join(reports_dir, "model_evaluation_report.csv")
-    fig_path = os.path.join(figures_dir, "roc_curve.png")
-
-    with open(model_path, "wb") as f:
-        pickle.dump(final_pipeline, f)
+    fig_path = os.path.join(reports_dir, "figures", "roc_curve.png")
+
+    with profiler.stage("save_model"):
+        tmp_path = f"{model_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(final_pipeline, f)
+        try:
+            check_pickle_reloads(tmp_path, final_pipeline, X_check)
+        except RuntimeError:
+            os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, model_path)
+        print("Verified the saved model reloads in a fresh interpreter.")
+
+        # Pickle-free, memory-mappable copy preferred by the API and dashboard
+        artifact_path = None
+        try:
+            artifact_path = save_artifact(
+                final_pipeline, os.path.join(models_dir, "best_model"), source_path=model_path,
+            )
+        except (UnsupportedPipelineError, ValueError) as e:
+            print(f"Skipping model artifact: {e}")
+            # A previous run's artifact would otherwise keep being served instead of this model
+            stale = os.path.join(models_dir, "best_model")
+            if remove_artifact(stale):
+                print(f"Removed stale artifact: {stale}")
 
     report_df = pd.DataFrame([
         {
@@ -247,33 +709,255 @@ def main(args: Optional[List[str]] = None) -> int:
             "recall": r["rec"],
             "f1": r["f1"],
             "roc_auc": r["roc_auc"],
+            # Cross-validated runs report fold means above plus their spread
+            **{
+                f"{name}_std": r[f"{key}_std"]
+                for key, name in zip(METRIC_KEYS, REPORT_COLUMNS)
+                if f"{key}_std" in r
+            },
+            **({"cv_folds": r["cv_folds"]} if "cv_folds" in r else {}),
+            **({"params": r["params"]} if "params" in r else {}),
+            **serving_report_columns(r),
         }
         for r in results
     ])
+    for col in ("batch_rows", "refit_batch_rows"):
+        if col in report_df:
+            # Candidates that weren't profiled leave blanks; keep the rest integers
+            report_df[col] = report_df[col].astype("Int64")
     report_df.to_csv(report_path, index=False)
-
-    # ROC curve using final pipeline on raw X_test for consistency
-    print("Generating ROC curve ...")
-    y_proba = final_pipeline.predict_proba(X_test)[:, 1]
-    fpr, tpr, _ = roc_curve(y_test, y_proba)
-
-    plt.figure(figsize=(7, 5))
-    plt.plot(fpr, tpr, label=f"{best['model']} (AUC={roc_auc_score(y_test, y_proba):.3f})")
-    plt.plot([0, 1], [0, 1], linestyle="--", color="gray")
-    plt.title("ROC Curve - Best Model")
-    plt.xlabel("False Positive Rate")
-    plt.ylabel("True Positive Rate")
-    plt.legend()
-    plt.grid(True, linestyle=":", alpha=0.6)
-    plt.tight_layout()
-    plt.savefig(fig_path, dpi=150)
-    plt.close()
+    leaderboard_path = None
+    if leaderboard is not None:
+        leaderboard_path = os.path.join(reports_dir, "search_leaderboard.csv")
+        cols = [
+            "rank", "model", "params", "round", "rows", "roc_auc", "roc_auc_std", "wall_seconds", "fold_fit_seconds",
+        ]
+        pd.DataFrame(leaderboard)[cols].to_csv(leaderboard_path, index=False)
+
+    with profiler.stage("roc_plot"):
+        fpr, tpr, _ = roc_curve(y_test, y_proba)
+
+        plt.figure(figsize=(7, 5))
+        plt.plot(fpr, tpr, label=f"{best_name} (AUC={roc_auc_score(y_test, y_proba):.3f})")
+        plt.plot([0, 1], [0, 1], linestyle="--", color="gray")
+        plt.title("ROC Curve - Best Model")
+        plt.xlabel("False Positive Rate")
+        plt.ylabel("True Positive Rate")
+        plt.legend()
+        plt.grid(True, linestyle=":", alpha=0.6)
+        plt.tight_layout()
+        plt.savefig(fig_path, dpi=150)
+        plt.close()
 
     print("\nFiles saved:")
     print(" -", model_path)
+    if artifact_path:
+        print(" -", artifact_path)
     print(" -", report_path)
+    if leaderboard_path:
+        print(" -", leaderboard_path)
     print(" -", fig_path)
 
+    profile_paths = profiler.write(os.path.join(reports_dir, "training_profile.json"))
+    for path in profile_paths:
+        print(" -", path)
+    if profiler.enabled:
+        print("\nStage timings:")
+        print(profiler.summary())
+
+
+def train_streaming(
+    csv_path: str, ns: argparse.Namespace, models_dir: str, reports_dir: str, profiler: StageProfiler,
+) -> int:
+    """``--streaming``: fit from CSV chunks without loading the dataset (see ``src.incremental``)."""
+    print(f"Streaming in chunks of {ns.chunk_size:,} rows, {ns.epochs} epoch(s) ...")
+    with profiler.stage("streaming_fit") as details:
+        final_pipeline, y_test, preds, y_proba, timings = fit_streaming_pipeline(
+            lambda: iter_telco_chunks(csv_path, ns.chunk_size, engine=ns.csv_engine),
+            build_preprocessor,
+            test_size=ns.test_size,
+            epochs=ns.epochs,
+            random_state=ns.random_state,
+        )
+        details.update(timings)
+    res = {"model": "SGDLogisticRegression (streaming)", **classification_metrics(y_test, preds, y_proba)}
+    print(f"{res['model']} (holdout, {len(y_test):,} rows) - {_format_metrics(res)}")
+    print("Generating ROC curve ...")
+    save_outputs(final_pipeline, [res], res["model"], y_test, y_proba, models_dir, reports_dir, profiler=profiler)
+    return 0
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Train churn prediction models and persist best pipeline.")
+    parser.add_argument("--data-path", type=str, default=None, help="Path to Telco CSV file.")
+    parser.add_argument("--test-size", type=float, default=0.2, help="Test size split fraction.")
+    parser.add_argument("--random-state", type=int, default=42, help="Random seed for reproducibility.")
+    parser.add_argument(
+        "--csv-engine", choices=CSV_ENGINES, default="c",
+        help="CSV parser for the typed load ('pyarrow' needs pyarrow installed).",
+    )
+    parser.add_argument(
+        "--cache-dir", type=str, default=os.path.join("data", "cache"),
+        help="Where the cleaned dataset is cached as Parquet (needs pyarrow).",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Always parse the CSV, skip the Parquet cache.")
+    parser.add_argument(
+        "--cv-folds", type=int, default=0,
+        help="Select the model on stratified K-fold CV of the training split (0 = single holdout).",
+    )
+    parser.add_argument(
+        "--search", action="store_true",
+        help="Successive-halving hyperparameter search per model family (uses --cv-folds, default 3).",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=1,
+        help="CPU cores for training candidates concurrently (-1 = all cores).",
+    )
+    parser.add_argument(
+        "--streaming", action="store_true",
+        help="Out-of-core training: read the CSV in chunks and fit an SGD logistic regression incrementally.",
+    )
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows per chunk with --streaming.")
+    parser.add_argument("--epochs", type=int, default=5, help="Passes over the training rows with --streaming.")
+    parser.add_argument(
+        "--max-latency-ms", type=float, default=None,
+        help="Serving budget: pick the best ROC AUC among candidates whose single-row latency is within this.",
+    )
+    parser.add_argument(
+        "--max-model-mb", type=float, default=None,
+        help="Serving budget: pick the best ROC AUC among candidates whose saved model is within this size.",
+    )
+    parser.add_argument(
+        "--cprofile", action="store_true",
+        help="Run each stage under cProfile and save the slowest one next to reports/training_profile.json.",
+    )
+    ns = parser.parse_args(args=args)
+    jobs = (os.cpu_count() or 1) if ns.jobs < 0 else max(ns.jobs, 1)
+    profiler = StageProfiler(cprofile=ns.cprofile)
+
+    # Prepare output dirs
+    models_dir = os.path.join("models")
+    reports_dir = os.path.join("reports")
+    figures_dir = os.path.join(reports_dir, "figures")
+    ensure_dirs([models_dir, reports_dir, figures_dir])
+
+    # Locate and load data
+    csv_path = find_data_file(ns.data_path)
+    print(f"Dataset: {csv_path}")
+    if ns.streaming:
+        return train_streaming(csv_path, ns, models_dir, reports_dir, profiler)
+    with profiler.stage("load_data") as details:
+        df = load_and_clean_data(csv_path, engine=ns.csv_engine, cache_dir=None if ns.no_cache else ns.cache_dir)
+        details["rows"] = len(df)
+    print("Dataset loaded. Shape:", df.shape)
+
+    # Split
+    if "Churn" not in df.columns:
+        raise ValueError("Dataset must contain 'Churn' column after loading.")
+
+    with profiler.stage("split"):
+        X = df.drop(columns=["Churn"])
+        y = df["Churn"].astype(int)
+
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=ns.test_size, stratify=y, random_state=ns.random_state
+        )
+    print(f"Train shape: {X_train.shape}, Test shape: {X_test.shape}")
+
+    # Fit preprocessing and feature selection, transform train/test
+    print("Fitting preprocessor and transforming data ...")
+    preprocessor, selector, X_train_sel, (X_test_sel,) = fit_feature_steps(X_train, y_train, X_test, profiler=profiler)
+    print("Feature selection complete. Selected features:", X_train_sel.shape[1])
+
+    # Train and evaluate candidate models
+    leaderboard = None
+    stage = "search" if ns.search else "cross_validate" if ns.cv_folds > 1 else "train_candidates"
+    with profiler.stage(stage, jobs=jobs) as details:
+        if ns.search:
+            results, best, leaderboard = search_models(
+                X_train, y_train, folds=ns.cv_folds if ns.cv_folds > 1 else 3, jobs=jobs,
+                random_state=ns.random_state,
+            )
+            details["configurations"] = len(leaderboard)
+        elif ns.cv_folds > 1:
+            results, best = cross_validate_models(
+                X_train, y_train, ns.cv_folds, jobs=jobs, random_state=ns.random_state,
+            )
+        else:
+            results, best = train_and_eval_models(
+                X_train_sel, X_test_sel, y_train, y_test, jobs=jobs, X_train=X_train, X_test=X_test,
+            )
+        # Measured where each fit ran, so pool workers are covered too
+        details["fit_seconds"] = {r["model"]: r["fit_seconds"] for r in results}
+    budget = {"max_latency_ms": ns.max_latency_ms, "max_model_mb": ns.max_model_mb}
+    budgeted = any(v is not None for v in budget.values())
+
+    def profile(res, estimator) -> bool:
+        _without_training_threads(estimator)
+        res.update(serving_profile(served_pipeline(preprocessor, selector, estimator), X_test))
+        if budgeted:
+            res["within_budget"] = within_budget(res, **budget)
+        return res.get("within_budget", True)
+
+    ranked = sorted(results, key=lambda r: r["roc_auc"], reverse=True)
+    if ns.search or ns.cv_folds > 1:
+        # A budget needs every candidate's serving cost, so all are refit on the full
+        # training split; without one only the best ROC AUC candidate is
+        refit = ranked if budgeted else ranked[:1]
+        print(f"\nFitting {', '.join(res['model'] for res in refit)} on the full training split ...")
+        with profiler.stage("holdout_refit", jobs=jobs):
+            fits = [
+                (res["estimator"], res["model"],
+                 *((X_train, X_test) if uses_raw_features(res["estimator"]) else (X_train_sel, X_test_sel)),
+                 y_train, y_test)
+                for res in refit
+            ]
+            tasks, workers = _budgeted_tasks(fits, jobs)
+            holdouts = list(_run_fits(tasks, workers))
+        for res, holdout in zip(refit, holdouts):
+            print(f"{res['model']} (holdout) - {_format_metrics(holdout)}")
+            res["refit_roc_auc"] = holdout["roc_auc"]
+        with profiler.stage("measure_serving"):
+            for res, holdout in zip(refit, holdouts):
+                profile(res, holdout["estimator"])
+        # Best ROC AUC within the serving budget (the first, without one)
+        chosen_res, holdout = next(
+            ((res, h) for res, h in zip(refit, holdouts) if res.get("within_budget", True)), (refit[0], holdouts[0])
+        )
+        chosen = {**chosen_res, "estimator": holdout["estimator"]}
+    else:
+        with profiler.stage("measure_serving"):
+            for res in results:
+                profile(res, res["estimator"])
+        chosen = next((res for res in ranked if res.get("within_budget", True)), ranked[0])
+    print_speed_table(results)
+
+    if budgeted:
+        limits = ", ".join(f"{k.replace('_', ' ')} {v}" for k, v in budget.items() if v is not None)
+        if chosen.get("within_budget"):
+            print(f"\nSelected within the serving budget ({limits}): {chosen['model']}")
+        else:
+            print(f"\nWarning: no candidate fits the serving budget ({limits}); keeping the best ROC AUC model, "
+                  f"{chosen['model']}")
+    best = chosen
+
+    if uses_raw_features(best["estimator"]):
+        # The candidate is its own end-to-end pipeline, fitted on the raw training frame
+        final_pipeline = best["estimator"]
+    else:
+        # Every step is already fitted on the training split; assemble instead of refitting
+        print("\nAssembling final pipeline from fitted components ...")
+        with profiler.stage("assemble_pipeline"):
+            final_pipeline = assemble_fitted_pipeline(preprocessor, selector, best["estimator"], X_test, X_test_sel)
+
+    # ROC curve using final pipeline on raw X_test for consistency
+    print("Generating ROC curve ...")
+    with profiler.stage("holdout_predict"):
+        y_proba = final_pipeline.predict_proba(X_test)[:, 1]
+    save_outputs(
+        final_pipeline, results, best["model"], y_test, y_proba, models_dir, reports_dir, leaderboard,
+        profiler=profiler, X_check=X_test.iloc[:200],
+    )
     return 0
 
 